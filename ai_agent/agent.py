@@ -3,6 +3,33 @@ from typing import Optional, Dict
 from user_sql import get_today_sales, get_customer_outstanding, get_stock_item
 
 
+# =====================================================
+# FIXED REPLIES (no runtime data)
+# Pre-synthesized into the TTS cache at startup.
+# =====================================================
+REPLY_EMPTY = "I could not hear anything. Please try again."
+REPLY_SALES_ERROR = "Unable to fetch today's sales. Please try again."
+REPLY_SALES_ERROR_SHORT = "Unable to fetch today's sales."
+REPLY_DOWNLOAD_REPORT = "Downloading today's sales report. Please wait."
+REPLY_OPEN_SALES = "Opening the sales screen for you."
+REPLY_TASK_STATUS = "Checking your task status for today."
+REPLY_ASK_ITEM = "Which item do you want to check?"
+REPLY_ASK_CUSTOMER = "Which customer?"
+REPLY_GREETING = "Hello! How can I help you today?"
+
+STATIC_REPLIES = (
+    REPLY_EMPTY,
+    REPLY_SALES_ERROR,
+    REPLY_SALES_ERROR_SHORT,
+    REPLY_DOWNLOAD_REPORT,
+    REPLY_OPEN_SALES,
+    REPLY_TASK_STATUS,
+    REPLY_ASK_ITEM,
+    REPLY_ASK_CUSTOMER,
+    REPLY_GREETING,
+)
+
+
 def safe_dict_get(d: dict, key: str, default=None):
     try:
         return d.get(key, default) if d else default
@@ -19,7 +46,7 @@ def generate_reply(text: Optional[str], intent: Optional[Dict] = None) -> str:
 
     t = (text or "").lower().strip()
     if not t:
-        return "I could not hear anything. Please try again."
+        return REPLY_EMPTY
 
     # =====================================================
     # INTENT HANDLING (HIGH CONFIDENCE ONLY)
@@ -49,22 +76,22 @@ def generate_reply(text: Optional[str], intent: Optional[Dict] = None) -> str:
                 )
             except Exception as e:
                 print(f"Today sales error: {e}")
-                return "Unable to fetch today's sales. Please try again."
+                return REPLY_SALES_ERROR
 
         # -------------------------------------------------
         # ✅ DOWNLOAD SALES REPORT (NAVIGATION ONLY)
         # -------------------------------------------------
         if name == "download_sales_report":
-            return "Downloading today's sales report. Please wait."
+            return REPLY_DOWNLOAD_REPORT
 
         # -------------------------------------------------
         # OTHER INTENTS
         # -------------------------------------------------
         if name == "open_sales_screen":
-            return "Opening the sales screen for you."
+            return REPLY_OPEN_SALES
 
         if name == "check_task_status":
-            return "Checking your task status for today."
+            return REPLY_TASK_STATUS
 
         if name == "search_user":
             uid = safe_dict_get(params, "user_id")
@@ -77,17 +104,17 @@ def generate_reply(text: Optional[str], intent: Optional[Dict] = None) -> str:
             if item:
                 data = get_stock_item(item) or {}
                 return f"We have {data.get('qty', 0)} units of {item} in stock."
-            return "Which item do you want to check?"
+            return REPLY_ASK_ITEM
 
         if name == "outstanding_check":
             cust = safe_dict_get(params, "customer_name")
             if cust:
                 data = get_customer_outstanding(cust) or {}
                 return f"{cust} has {data.get('pending', 0)} rupees outstanding."
-            return "Which customer?"
+            return REPLY_ASK_CUSTOMER
 
         if name == "smalltalk":
-            return "Hello! How can I help you today?"
+            return REPLY_GREETING
 
         return ""
 
@@ -105,6 +132,6 @@ def generate_reply(text: Optional[str], intent: Optional[Dict] = None) -> str:
                 f"from {s.get('orders', 0)} orders."
             )
         except:
-            return "Unable to fetch today's sales."
+            return REPLY_SALES_ERROR_SHORT
 
     return ""
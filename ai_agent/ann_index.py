@@ -0,0 +1,272 @@
+# ai_agent/ann_index.py
+"""
+FAISS index factory for the vector stores.
+
+Picks the index type from the corpus size:
+
+    < FLAT_MAX_VECTORS   -> exact IndexFlat      (brute force, no training)
+    < HNSW_MAX_VECTORS   -> IndexHNSWFlat        (graph, no training, no removal)
+    otherwise            -> IndexIVFPQ           (trained, compressed, removal ok)
+
+Flat and HNSW are wrapped in IndexIDMap so callers always address vectors
+by their own int64 ids. Run `python -m ai_agent.ann_index` for a
+recall-vs-latency benchmark against the flat baseline.
+"""
+import os
+import math
+import time
+import numpy as np
+import faiss
+
+FLAT = "flat"
+HNSW = "hnsw"
+IVFPQ = "ivfpq"
+
+# "auto" or force one of flat / hnsw / ivfpq
+VECTOR_INDEX_KIND = os.environ.get("VECTOR_INDEX_KIND", "auto").lower()
+FLAT_MAX_VECTORS = int(os.environ.get("FLAT_MAX_VECTORS", 50_000))
+HNSW_MAX_VECTORS = int(os.environ.get("HNSW_MAX_VECTORS", 1_000_000))
+
+HNSW_M = int(os.environ.get("HNSW_M", 32))
+HNSW_EF_CONSTRUCTION = int(os.environ.get("HNSW_EF_CONSTRUCTION", 80))
+VECTOR_EF_SEARCH = int(os.environ.get("VECTOR_EF_SEARCH", 64))
+VECTOR_NPROBE = int(os.environ.get("VECTOR_NPROBE", 16))
+# streaming builds train IVF-PQ on the first this-many vectors
+IVF_TRAIN_SAMPLE = int(os.environ.get("IVF_TRAIN_SAMPLE", 100_000))
+
+# PQ code size; k-means wants >= 39 training points per centroid (2**nbits)
+PQ_NBITS = 8
+MIN_POINTS_PER_CENTROID = 39
+IVFPQ_MIN_VECTORS = MIN_POINTS_PER_CENTROID * 2 ** PQ_NBITS
+
+
+def choose_kind(n_vectors: int) -> str:
+    if VECTOR_INDEX_KIND in (FLAT, HNSW, IVFPQ):
+        kind = VECTOR_INDEX_KIND
+    elif n_vectors < FLAT_MAX_VECTORS:
+        kind = FLAT
+    elif n_vectors < HNSW_MAX_VECTORS:
+        kind = HNSW
+    else:
+        kind = IVFPQ
+
+    if kind == IVFPQ and n_vectors < IVFPQ_MIN_VECTORS:
+        # too few vectors to train the PQ codebooks (forced kind, or a
+        # small HNSW_MAX_VECTORS)
+        fallback = FLAT if n_vectors < FLAT_MAX_VECTORS else HNSW
+        print(
+            f"IVF-PQ needs {IVFPQ_MIN_VECTORS} vectors to train, have {n_vectors}; "
+            f"using {fallback}"
+        )
+        return fallback
+    return kind
+
+
+def _pq_nbits(n_train: int) -> int:
+    """Largest code size (<= PQ_NBITS) that n_train points can train."""
+    nbits = PQ_NBITS
+    while nbits > 1 and n_train < MIN_POINTS_PER_CENTROID * 2 ** nbits:
+        nbits -= 1
+    if n_train < MIN_POINTS_PER_CENTROID * 2 ** nbits:
+        raise ValueError(
+            f"IVF-PQ needs at least {MIN_POINTS_PER_CENTROID * 2 ** nbits} training vectors, got {n_train}"
+        )
+    if nbits < PQ_NBITS:
+        print(f"IVF-PQ trained on {n_train} vectors: PQ codes reduced to {nbits} bits")
+    return nbits
+
+
+def _pq_subquantizers(dim: int) -> int:
+    # ~8 dims per sub-quantizer keeps recall reasonable; m must divide dim
+    for m in range(max(1, dim // 8), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def _base(index):
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def create_index(kind: str, dim: int, metric: int = faiss.METRIC_L2, train_vectors=None,
+                 n_total: int = None):
+    """
+    New, empty (but trained, for IVF-PQ) index that accepts add_with_ids.
+    n_total sizes the IVF lists when training on a sample of the corpus.
+    """
+    if kind == FLAT:
+        base = faiss.IndexFlat(dim, metric)
+        return faiss.IndexIDMap(base)
+
+    if kind == HNSW:
+        base = faiss.IndexHNSWFlat(dim, HNSW_M, metric)
+        base.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        index = faiss.IndexIDMap(base)
+        apply_search_params(index)
+        return index
+
+    if kind == IVFPQ:
+        if train_vectors is None or len(train_vectors) == 0:
+            raise ValueError("IVF-PQ needs training vectors")
+        n = len(train_vectors)
+        # ~4*sqrt(N) lists, but keep >= 39 training points per list
+        nlist = max(1, min(int(4 * math.sqrt(max(n, n_total or 0))), n // 39))
+        quantizer = faiss.IndexFlat(dim, metric)
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, _pq_subquantizers(dim), _pq_nbits(n), metric)
+        index.train(np.ascontiguousarray(train_vectors, dtype="float32"))
+        apply_search_params(index)
+        return index
+
+    raise ValueError(f"Unknown index kind: {kind}")
+
+
+def index_kind(index) -> str:
+    base = _base(index)
+    if isinstance(base, faiss.IndexHNSW):
+        return HNSW
+    if isinstance(base, faiss.IndexIVF):
+        return IVFPQ
+    return FLAT
+
+
+def supports_remove(index) -> bool:
+    return index_kind(index) != HNSW
+
+
+def exact_ids(index):
+    """
+    Ids stored in an ID-mapped Flat/HNSW index, whose vectors a rebuild can
+    reuse instead of re-encoding. None for lossy (PQ) indexes.
+    """
+    if index_kind(index) == IVFPQ or not isinstance(index, faiss.IndexIDMap):
+        return None
+    return faiss.vector_to_array(index.id_map).astype("int64")
+
+
+def iter_exact_vectors(index, batch_size: int):
+    """(ids, vectors) of an index accepted by exact_ids(), batch_size at a time."""
+    ids = exact_ids(index)
+    base = _base(index)
+    for start in range(0, len(ids), batch_size):
+        n = min(batch_size, len(ids) - start)
+        yield ids[start:start + n], base.reconstruct_n(start, n)
+
+
+def apply_search_params(index, nprobe: int = None, ef_search: int = None):
+    """Recall/latency knobs: nprobe for IVF, efSearch for HNSW."""
+    base = _base(index)
+    if isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = ef_search or VECTOR_EF_SEARCH
+    elif isinstance(base, faiss.IndexIVF):
+        base.nprobe = nprobe or VECTOR_NPROBE
+
+
+def build_index_from_batches(kind: str, dim: int, batches, metric: int = faiss.METRIC_L2,
+                             n_total: int = None, train_size: int = IVF_TRAIN_SAMPLE):
+    """
+    Index of `kind` filled from an iterable of (ids, vectors) batches, so the
+    corpus never has to be in memory at once. IVF-PQ is trained on the first
+    `train_size` vectors, which are buffered until then.
+    """
+    index = None
+    pending_ids, pending_vecs, n_pending = [], [], 0
+    if kind != IVFPQ:
+        index = create_index(kind, dim, metric)
+
+    for ids, vectors in batches:
+        if not len(ids):
+            continue
+        ids = np.asarray(ids, dtype="int64")
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        if index is not None:
+            index.add_with_ids(vectors, ids)
+            continue
+        pending_ids.append(ids)
+        pending_vecs.append(vectors)
+        n_pending += len(ids)
+        if n_pending >= train_size:
+            index = _trained_ivfpq(dim, metric, pending_ids, pending_vecs, n_total)
+            pending_ids, pending_vecs = [], []
+
+    if index is None:
+        index = _trained_ivfpq(dim, metric, pending_ids, pending_vecs, n_total)
+    return index
+
+
+def _trained_ivfpq(dim, metric, ids, vectors, n_total):
+    vectors = np.concatenate(vectors) if vectors else np.zeros((0, dim), dtype="float32")
+    index = create_index(IVFPQ, dim, metric, train_vectors=vectors, n_total=n_total)
+    index.add_with_ids(vectors, np.concatenate(ids))
+    return index
+
+
+def build_index(kind: str, dim: int, ids, vectors, metric: int = faiss.METRIC_L2):
+    return build_index_from_batches(kind, dim, [(ids, vectors)], metric, n_total=len(ids))
+
+
+# =========================
+# BENCHMARK
+# =========================
+def _clustered_data(n: int, dim: int, n_queries: int, seed: int = 0):
+    # clustered like real sentence embeddings, rather than uniform noise
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, n // 100), dim)).astype("float32")
+    data = centers[rng.integers(0, len(centers), n)] + 0.3 * rng.standard_normal((n, dim)).astype("float32")
+    queries = centers[rng.integers(0, len(centers), n_queries)] + 0.3 * rng.standard_normal((n_queries, dim)).astype("float32")
+    return data.astype("float32"), queries.astype("float32")
+
+
+def benchmark(n: int = 100_000, dim: int = 384, n_queries: int = 500, k: int = 5,
+              kinds=(HNSW, IVFPQ), ef_values=(16, 32, 64, 128), nprobe_values=(4, 8, 16, 32)):
+    """Recall@k and mean query latency of each index kind vs exact search."""
+    data, queries = _clustered_data(n, dim, n_queries)
+    ids = np.arange(n, dtype="int64")
+    rows = []
+
+    def _measure(index, label):
+        started = time.perf_counter()
+        for q in queries:
+            index.search(q.reshape(1, -1), k)
+        per_query_ms = (time.perf_counter() - started) * 1000 / n_queries
+        _, found = index.search(queries, k)
+        recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+        rows.append((label, recall, per_query_ms))
+
+    flat = build_index(FLAT, dim, ids, data)
+    _, truth = flat.search(queries, k)
+    _measure(flat, "flat")
+
+    for kind in kinds:
+        started = time.perf_counter()
+        index = build_index(kind, dim, ids, data)
+        build_s = time.perf_counter() - started
+        print(f"{kind}: built in {build_s:.1f}s")
+        if kind == HNSW:
+            for ef in ef_values:
+                apply_search_params(index, ef_search=ef)
+                _measure(index, f"hnsw efSearch={ef}")
+        elif kind == IVFPQ:
+            for nprobe in nprobe_values:
+                apply_search_params(index, nprobe=nprobe)
+                _measure(index, f"ivfpq nprobe={nprobe}")
+
+    print(f"\nn={n} dim={dim} queries={n_queries} k={k}")
+    print(f"{'index':<24}{'recall@k':>10}{'ms/query':>12}")
+    for label, recall, ms in rows:
+        print(f"{label:<24}{recall:>10.3f}{ms:>12.3f}")
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="ANN recall vs latency benchmark")
+    parser.add_argument("--n", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    benchmark(n=args.n, dim=args.dim, n_queries=args.queries, k=args.k)
@@ -0,0 +1,188 @@
+# ai_agent/encoder.py
+import os
+import time
+
+import numpy as np
+
+import model_registry
+
+# Sentence encoder shared by every vector store; loaded on first use
+EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_DEVICE = os.environ.get("EMBEDDING_DEVICE", "cpu")
+
+# torch | onnx | onnx-int8. The ONNX Runtime backends need
+# sentence-transformers>=3.2 with its onnx extra installed.
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch").lower()
+BACKENDS = ("torch", "onnx", "onnx-int8")
+# ONNX file inside the model repo; the int8 default runs on any AVX2 CPU
+# (use onnx/model_qint8_avx512.onnx or onnx/model_qint8_arm64.onnx where they fit)
+EMBEDDING_ONNX_FILE = os.environ.get("EMBEDDING_ONNX_FILE", "")
+INT8_ONNX_FILE = "onnx/model_quint8_avx2.onnx"
+
+
+def _onnx_file(backend: str):
+    if EMBEDDING_ONNX_FILE:
+        return EMBEDDING_ONNX_FILE
+    return INT8_ONNX_FILE if backend == "onnx-int8" else None
+
+
+def _signature(backend: str) -> str:
+    # fp32 ONNX matches PyTorch to float precision; int8 is its own vector space
+    if backend == "onnx-int8" or (backend == "onnx" and EMBEDDING_ONNX_FILE):
+        return f"{EMBEDDING_MODEL}:{backend}:{_onnx_file(backend)}"
+    return EMBEDDING_MODEL
+
+
+# stored in index manifests: changing it rebuilds the indexes
+EMBEDDING_SIGNATURE = _signature(EMBEDDING_BACKEND)
+
+
+def load_encoder(backend: str = EMBEDDING_BACKEND):
+    """A new encoder instance for `backend`; the app uses the shared one from get_encoder()."""
+    from sentence_transformers import SentenceTransformer
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend} (expected one of {BACKENDS})")
+    if backend == "torch":
+        return SentenceTransformer(EMBEDDING_MODEL, device=EMBEDDING_DEVICE)
+
+    kwargs = {}
+    file_name = _onnx_file(backend)
+    if file_name:
+        kwargs["model_kwargs"] = {"file_name": file_name}
+    try:
+        return SentenceTransformer(EMBEDDING_MODEL, device=EMBEDDING_DEVICE, backend="onnx", **kwargs)
+    except TypeError:
+        raise RuntimeError("ONNX embedding backend needs sentence-transformers>=3.2")
+
+
+def _load_encoder():
+    return load_encoder(EMBEDDING_BACKEND)
+
+
+model_registry.register("embedding", _load_encoder)
+
+
+def get_encoder():
+    return model_registry.get("embedding")
+
+
+def embedding_dim() -> int:
+    return get_encoder().get_sentence_embedding_dimension()
+
+
+# =========================
+# PARITY / BENCHMARK
+# =========================
+# indexed rows and the way people ask for them
+SAMPLE_TEXTS = (
+    "Employee S.MURUGAN, EmpNo 1023 Designation Supervisor, Department Weaving, Mobile 8667571172",
+    "Employee RAMESH KUMAR, EmpNo 88 Designation Operator, Department Spinning, Mobile 9443012345",
+    "Employee KARTHIK, EmpNo 4512 Designation Accountant, Department Accounts, Mobile 9876501234",
+    "Employee SIVA PRAKASH, EmpNo 310 Designation Electrician, Department Maintenance, Mobile 9003344556",
+    "Employee LAKSHMI, EmpNo 77 Designation HR Executive, Department HR, Mobile 9840011223",
+    "Employee ANAND, EmpNo 1500 Designation Driver, Department Transport, Mobile 9789900112",
+    "show murugan details",
+    "who is ramesh from spinning",
+    "karthik accounts mobile number",
+    "shiva electrician",
+    "hr executive lakshmi",
+    "driver in transport department",
+    "hello how are you",
+    "download the sales report",
+)
+
+
+def _normalized(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype="float32")
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def parity(backend: str = EMBEDDING_BACKEND, reference: str = "torch", texts=SAMPLE_TEXTS) -> dict:
+    """
+    How closely `backend` reproduces `reference` embeddings: per-text
+    cosine, and how often each text's nearest neighbour stays the same.
+    """
+    texts = list(texts)
+    ref = _normalized(load_encoder(reference).encode(texts))
+    got = _normalized(load_encoder(backend).encode(texts))
+    cosine = np.sum(ref * got, axis=1)
+
+    def _neighbours(v):
+        sims = v @ v.T
+        np.fill_diagonal(sims, -np.inf)
+        return np.argmax(sims, axis=1)
+
+    return {
+        "backend": backend,
+        "reference": reference,
+        "min_cosine": round(float(np.min(cosine)), 5),
+        "mean_cosine": round(float(np.mean(cosine)), 5),
+        "top1_agreement": round(float(np.mean(_neighbours(ref) == _neighbours(got))), 3),
+    }
+
+
+def _rss_mb():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def benchmark(backend: str = EMBEDDING_BACKEND, repeats: int = 200, batch_size: int = 64) -> dict:
+    """
+    Load time, RSS added by the model, single-query latency and batch
+    throughput for one backend. Run one backend per process so the RSS
+    figure isn't polluted by another model.
+    """
+    rss_before = _rss_mb()
+    started = time.perf_counter()
+    encoder = load_encoder(backend)
+    load_s = time.perf_counter() - started
+    queries = list(SAMPLE_TEXTS)
+    encoder.encode(queries)  # first call allocates / compiles
+
+    latencies = []
+    for i in range(repeats):
+        started = time.perf_counter()
+        encoder.encode([queries[i % len(queries)]], show_progress_bar=False)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    batch = (queries * (batch_size // len(queries) + 1))[:batch_size]
+    started = time.perf_counter()
+    for _ in range(5):
+        encoder.encode(batch, batch_size=batch_size, show_progress_bar=False)
+    per_second = 5 * batch_size / (time.perf_counter() - started)
+
+    rss_after = _rss_mb()
+    return {
+        "backend": backend,
+        "load_s": round(load_s, 2),
+        "rss_mb": round(rss_after - rss_before, 1) if rss_before is not None else None,
+        "query_ms_p50": round(float(np.percentile(latencies, 50)), 2),
+        "query_ms_p95": round(float(np.percentile(latencies, 95)), 2),
+        "texts_per_s": round(per_second, 1),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Embedding backend parity check and benchmark")
+    parser.add_argument("--backend", default=EMBEDDING_BACKEND, choices=BACKENDS)
+    parser.add_argument("--parity", action="store_true", help="compare against the torch backend")
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.parity:
+        print(json.dumps(parity(args.backend), indent=2))
+    else:
+        print(json.dumps(benchmark(args.backend, repeats=args.repeats), indent=2))
@@ -0,0 +1,174 @@
+# ai_agent/lexical_index.py
+import re
+from collections import defaultdict
+
+PREFIX_LEN = 4
+MIN_TOKEN_LEN = 2
+# shorter tokens only match exactly: their phonetic keys collide too easily
+MIN_FUZZY_LEN = 4
+MIN_CODE_DIGITS = 1
+MOBILE_DIGITS = 10
+
+# STT spells Indian names inconsistently (Shiva/Siva, Karthik/Kartik,
+# Murugan/Murugun): fold the usual variants before building the key
+_PHONETIC_FOLDS = (
+    ("sh", "s"), ("th", "t"), ("dh", "d"), ("kh", "k"), ("gh", "g"),
+    ("bh", "b"), ("ph", "f"), ("ch", "c"), ("zh", "l"), ("w", "v"),
+    ("q", "k"), ("z", "s"), ("x", "ks"), ("y", "i"),
+)
+
+# a number is read as a code only right after an employee cue:
+# "emp 7", "emp no 7", "employee id: 7", "empno 7"
+_CODE_CUE = re.compile(
+    r"\b(?:emp|empno|employee)\s*(?:no|number|id|code)?\.?\s*[:#-]?\s*(\d+)\b"
+)
+
+# words of ordinary requests; never name evidence ("show" ~ "siva")
+STOPWORDS = frozenset("""
+    a an the and or of to for in on at by with from is are was be am
+    me my mine i we our you your he she his her it its they them this that these those
+    what whats who whom whose which when where why how
+    show tell give get find open check list send download export save see
+    please pls thanks thank many much more some any all
+    today todays yesterday tomorrow now day days week month year
+    sales sale report stock order orders task status details detail info
+    employee employees emp empno number mobile phone name id code
+    hello hi hey good morning evening ok okay yes no
+""".split())
+
+# RRF constant from the original paper; dampens the weight of top ranks
+RRF_K = 60
+
+
+def _tokens(text: str) -> list:
+    return [t for t in re.split(r"[^a-z]+", (text or "").lower()) if len(t) >= MIN_TOKEN_LEN]
+
+
+def _fuzzy(token: str) -> bool:
+    """Whether a token gets phonetic / prefix keys."""
+    return len(token) >= MIN_FUZZY_LEN and token not in STOPWORDS
+
+
+def _digits(text) -> str:
+    return re.sub(r"\D", "", str(text or ""))
+
+
+def phonetic_key(token: str) -> str:
+    """Consonant skeleton: first letter kept, vowels and repeats dropped."""
+    t = token.lower()
+    for a, b in _PHONETIC_FOLDS:
+        t = t.replace(a, b)
+    if not t:
+        return ""
+    key = t[0]
+    for c in t[1:]:
+        if c in "aeiouh":
+            continue
+        if c != key[-1]:
+            key += c
+    return key
+
+
+class LexicalIndex:
+    """
+    In-memory inverted index over a row's numeric code (EmpNo, item code),
+    mobile number and name, keyed by the same ids as the FAISS index.
+    Fields set to None are not indexed.
+
+    exact()  -> ids for an unambiguous code / mobile / full-name hit (O(1))
+    ranked() -> ids ordered by name-token evidence, for rank fusion
+    named()  -> ids whose name contains a query token verbatim
+    """
+
+    def __init__(self, meta: dict = None, code_field: str = None,
+                 mobile_field: str = None, name_field: str = None):
+        self.code_field = code_field
+        self.mobile_field = mobile_field
+        self.name_field = name_field
+        self.by_code = defaultdict(set)
+        self.by_mobile = defaultdict(set)
+        self.by_name = defaultdict(set)     # full normalized name
+        self.by_token = defaultdict(set)
+        self.by_prefix = defaultdict(set)
+        self.by_phonetic = defaultdict(set)
+        if meta:
+            self.build(meta)
+
+    def build(self, meta: dict):
+        for eid, row in meta.items():
+            self.add(eid, row)
+
+    def add(self, eid: int, row: dict):
+        if self.code_field:
+            code = _digits(row.get(self.code_field))
+            if len(code) >= MIN_CODE_DIGITS:
+                self.by_code[code.lstrip("0") or "0"].add(eid)
+
+        if self.mobile_field:
+            mobile = _digits(row.get(self.mobile_field))
+            if len(mobile) >= MOBILE_DIGITS:
+                self.by_mobile[mobile[-MOBILE_DIGITS:]].add(eid)
+
+        tokens = _tokens(row.get(self.name_field)) if self.name_field else []
+        if tokens:
+            self.by_name[" ".join(tokens)].add(eid)
+        for t in tokens:
+            self.by_token[t].add(eid)
+            if _fuzzy(t):
+                self.by_prefix[t[:PREFIX_LEN]].add(eid)
+                self.by_phonetic[phonetic_key(t)].add(eid)
+
+    def exact(self, query: str) -> list:
+        q = (query or "").lower()
+
+        for raw in re.findall(r"\d[\d\s+-]*\d|\d", q):
+            digits = _digits(raw)
+            if len(digits) >= MOBILE_DIGITS:
+                hits = self.by_mobile.get(digits[-MOBILE_DIGITS:])
+                if hits:
+                    return sorted(hits)
+
+        # short numbers only count as a code right after "emp" / "employee"
+        # (or as the whole query), so "sales number for 7 days" and "who has
+        # 2 pending orders" don't resolve to employee 7 / 2
+        codes = _CODE_CUE.findall(q) if _tokens(q) else re.findall(r"\d+", q)
+        for code in codes:
+            hits = self.by_code.get(code.lstrip("0") or "0")
+            if hits:
+                return sorted(hits)
+
+        # the whole query is someone's name ("murugan", "s murugan")
+        tokens = _tokens(query)
+        hits = self.by_name.get(" ".join(tokens)) if tokens else None
+        return sorted(hits) if hits else []
+
+    def ranked(self, query: str) -> list:
+        scores = defaultdict(float)
+        for t in _tokens(query):
+            if t in STOPWORDS:
+                continue
+            for eid in self.by_token.get(t, ()):
+                scores[eid] += 3.0
+            if _fuzzy(t):
+                for eid in self.by_phonetic.get(phonetic_key(t), ()):
+                    scores[eid] += 2.0
+                for eid in self.by_prefix.get(t[:PREFIX_LEN], ()):
+                    scores[eid] += 1.0
+        return sorted(scores, key=lambda eid: (-scores[eid], eid))
+
+    def named(self, query: str) -> set:
+        """Ids with a name token spelled exactly as in the query."""
+        ids = set()
+        for t in _tokens(query):
+            if t not in STOPWORDS:
+                ids.update(self.by_token.get(t, ()))
+        return ids
+
+
+def reciprocal_rank_fusion(*rankings, k: int = RRF_K) -> list:
+    """Merge ranked id lists: score(id) = sum(1 / (k + rank))."""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, eid in enumerate(ranking, start=1):
+            scores[eid] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
@@ -1,6 +1,8 @@
 import os, json
 from dotenv import load_dotenv
 
+import model_registry
+
 load_dotenv()
 
 # =========================
@@ -117,19 +119,22 @@ CONFIDENCE RULES:
 # GROQ SETUP
 # =========================
 GROQ_KEY = os.getenv("GROQ_API_KEY")
-GROQ_MODEL = "llama-3.1-8b-instant"
+GROQ_MODEL = os.getenv("LLM_MODEL", "llama-3.1-8b-instant")
 
-_has_groq = False
-client = None
 
-if GROQ_KEY:
+def _load_client():
+    # None when no key is configured or the groq package is missing
+    if not GROQ_KEY:
+        return None
     try:
         from groq import Groq
 
-        client = Groq(api_key=GROQ_KEY)
-        _has_groq = True
+        return Groq(api_key=GROQ_KEY)
     except:
-        _has_groq = False
+        return None
+
+
+model_registry.register("groq", _load_client)
 
 
 # =========================
@@ -166,7 +171,8 @@ def call_llm(user_text: str, business_context=None):
     business_context→ real data from backend (employee, sales, stock, etc.)
     """
 
-    if not _has_groq:
+    client = model_registry.get("groq")
+    if client is None:
         return {
             "intent": "unknown",
             "params": {},
@@ -0,0 +1,113 @@
+# ai_agent/meta_store.py
+import os
+import json
+import sqlite3
+import threading
+
+# bytes of the DB file SQLite may memory-map for reads
+META_MMAP_BYTES = int(os.environ.get("META_MMAP_BYTES", 256 * 1024 * 1024))
+
+
+class MetaStore:
+    """
+    Row metadata keyed by FAISS id, in SQLite.
+
+    Nothing is parsed up front: opening is O(1), reads go through SQLite's
+    memory-mapped pages and decode only the rows that are asked for.
+    Each row keeps two hashes so a sync can tell "re-embed" (text_hash)
+    from "metadata only" (row_hash) changes. WAL mode lets searches read
+    while a sync is writing. A version number committed with the rows
+    lets the owner check them against the index files on disk.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute(f"PRAGMA mmap_size={META_MMAP_BYTES}")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta ("
+                " id INTEGER PRIMARY KEY,"
+                " text_hash TEXT NOT NULL,"
+                " row_hash TEXT NOT NULL,"
+                " row TEXT NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT)")
+            self._local.conn = conn
+        return conn
+
+    # -------------------------
+    # reads
+    # -------------------------
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM meta").fetchone()[0]
+
+    def get(self, eid: int):
+        row = self._conn().execute("SELECT row FROM meta WHERE id = ?", (int(eid),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, ids) -> dict:
+        ids = [int(i) for i in ids]
+        if not ids:
+            return {}
+        marks = ",".join("?" * len(ids))
+        rows = self._conn().execute(
+            f"SELECT id, row FROM meta WHERE id IN ({marks})", ids
+        ).fetchall()
+        return {eid: json.loads(row) for eid, row in rows}
+
+    def version(self) -> int:
+        row = self._conn().execute("SELECT value FROM info WHERE key = 'version'").fetchone()
+        return int(row[0]) if row else 0
+
+    def hashes(self) -> dict:
+        """id -> (text_hash, row_hash) for every stored row."""
+        rows = self._conn().execute("SELECT id, text_hash, row_hash FROM meta")
+        return {eid: (th, rh) for eid, th, rh in rows}
+
+    def rows(self):
+        for eid, row in self._conn().execute("SELECT id, row FROM meta"):
+            yield eid, json.loads(row)
+
+    # -------------------------
+    # writes
+    # -------------------------
+    def apply(self, upserts: dict, deletes, version: int = None) -> None:
+        """
+        One transaction: upserts is {id: (row, text_hash, row_hash)},
+        deletes an iterable of ids, version (if given) is stored with them.
+        """
+        conn = self._conn()
+        with self._write_lock, conn:
+            deletes = [(int(eid),) for eid in deletes]
+            if deletes:
+                conn.executemany("DELETE FROM meta WHERE id = ?", deletes)
+            if upserts:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO meta (id, text_hash, row_hash, row) VALUES (?, ?, ?, ?)",
+                    [
+                        (int(eid), th, rh, json.dumps(row, separators=(",", ":"), default=str))
+                        for eid, (row, th, rh) in upserts.items()
+                    ],
+                )
+            if version is not None:
+                self._set_version(conn, version)
+
+    def _set_version(self, conn, version: int):
+        conn.execute(
+            "INSERT OR REPLACE INTO info (key, value) VALUES ('version', ?)", (str(int(version)),)
+        )
+
+    def clear(self) -> None:
+        conn = self._conn()
+        with self._write_lock, conn:
+            conn.execute("DELETE FROM meta")
+            self._set_version(conn, 0)
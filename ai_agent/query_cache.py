@@ -0,0 +1,78 @@
+# ai_agent/query_cache.py
+import re
+import time
+import threading
+from collections import OrderedDict
+
+
+def normalize_query(query: str) -> str:
+    """'  Show RAMESH? ' and 'show ramesh' share one cache entry."""
+    q = re.sub(r"\s+", " ", (query or "").lower()).strip()
+    return q.strip(" .,!?;:")
+
+
+class QueryCache:
+    """
+    Thread-safe bounded LRU with optional TTL and hit/miss counters.
+    put() can override the TTL per entry (e.g. shorter for negative results).
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float = 0):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._data = OrderedDict()  # key -> (stored_at, value, ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[2] and time.monotonic() - item[0] > item[2]:
+                del self._data[key]
+                item = None
+
+            if item is None:
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key, value, ttl_seconds: float = None):
+        if self.max_entries <= 0:
+            return
+        ttl = self.ttl if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._data[key] = (time.monotonic(), value, ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key):
+        """Live (unexpired) entry for key; doesn't count as a hit or miss."""
+        with self._lock:
+            item = self._data.get(key)
+            return item is not None and not (item[2] and time.monotonic() - item[0] > item[2])
+
+    def pop(self, key):
+        """Drop one entry; returns its value (None if absent)."""
+        with self._lock:
+            item = self._data.pop(key, None)
+            return item[1] if item is not None else None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
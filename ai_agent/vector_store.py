@@ -1,71 +1,684 @@
+# ai_agent/vector_store.py
+"""
+Vector search over named collections (employees, customers, stock items,
+FAQ, ...). Every collection shares the one sentence encoder from
+ai_agent.encoder and the query-embedding cache; each has its own index
+files, metadata store and lexical index under data/<name>*.
+
+A module registers a collection factory with register(); get() builds the
+collection on first use, search() is the common entry point.
+"""
 import faiss
+import glob
 import json
 import os
+import hashlib
+import random
+import threading
+import time
 import numpy as np
-from sentence_transformers import SentenceTransformer
 
-MODEL_NAME = "all-MiniLM-L6-v2"
-INDEX_FILE = "data/employee.index"
-META_FILE = "data/employee_meta.json"
+from ai_agent.encoder import get_encoder, embedding_dim, EMBEDDING_SIGNATURE
+from ai_agent.query_cache import QueryCache, normalize_query
+from ai_agent import ann_index
+from ai_agent.lexical_index import LexicalIndex, reciprocal_rank_fusion
+from ai_agent.meta_store import MetaStore
+
+DATA_DIR = "data"
+# per collection: one index file per generation (the manifest names the
+# live one), the metadata store and the manifest
+INDEX_FILE_PATTERN = "{name}.{generation}.index"
+META_FILE_PATTERN = "{name}_meta.sqlite"
+MANIFEST_FILE_PATTERN = "{name}_manifest.json"
+# 2: cosine metric, 3: ids include CompCode/LocCode, 4: metadata in SQLite,
+# 5: versioned index files
+MANIFEST_VERSION = 5
+
+# memory-map index files instead of reading them into RAM
+FAISS_MMAP = os.environ.get("FAISS_MMAP", "1") == "1"
+
+# Vectors are L2-normalized and searched by inner product, so `_score` is
+# cosine similarity (higher is better). Hits below min_score are dropped
+# before they reach the LLM prompt. The cut-off is re-calibrated on every
+# index change; VECTOR_MIN_SCORE is used until then, or always if
+# VECTOR_MIN_SCORE_FIXED=1.
+METRIC = faiss.METRIC_INNER_PRODUCT
+VECTOR_MIN_SCORE = float(os.environ.get("VECTOR_MIN_SCORE", 0.3))
+VECTOR_MIN_SCORE_FIXED = os.environ.get("VECTOR_MIN_SCORE_FIXED", "0") == "1"
+CALIBRATION_SAMPLE = 200
+
+# utterances that must not pull any record into the prompt; collections
+# add their own (what is off-topic for employees is on-topic for stock)
+OFF_TOPIC_QUERIES = (
+    "hello how are you",
+    "tell me a joke",
+    "what is the weather today",
+)
+
+# repeated voice queries ("show Ramesh") skip the encoder / the whole search
+QUERY_CACHE_SIZE = int(os.environ.get("QUERY_CACHE_SIZE", 1024))
+QUERY_CACHE_TTL = float(os.environ.get("QUERY_CACHE_TTL", 0))  # seconds, 0 = no expiry
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", 512))
+
+# syncs stream rows: written and embedded EMBED_BATCH_SIZE at a time
+EMBED_BATCH_SIZE = int(os.environ.get("EMBED_BATCH_SIZE", 1024))
+# sentences per forward pass inside one batch
+ENCODE_BATCH_SIZE = int(os.environ.get("ENCODE_BATCH_SIZE", 64))
+# >0: large syncs encode across this many worker processes (each loads
+# its own copy of the model)
+EMBED_PROCESSES = int(os.environ.get("EMBED_PROCESSES", 0))
+PROGRESS_INTERVAL = 10.0  # seconds between throughput reports
+
+# embeddings only depend on the query text and the shared encoder, so one
+# cache serves every collection
+_query_vectors = QueryCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+
+
+def row_id(key: str) -> int:
+    """Stable FAISS id for a row's identity key: positive int64 from a hash."""
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") & 0x7FFFFFFFFFFFFFFF
+
+
+def _content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _row_hash(row: dict) -> str:
+    return _content_hash(json.dumps(row, sort_keys=True, default=str))
+
+
+# =========================
+# INDEX FILES
+# =========================
+# IO_FLAG_MMAP alone only maps IVF inverted lists; IO_FLAG_MMAP_IFC (faiss
+# >= 1.9) also maps Flat/HNSW vectors. Without it those are read into RAM.
+_MMAP_FLAGS = faiss.IO_FLAG_MMAP | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+
+
+def _read_index(path: str):
+    """
+    Memory-mapped when possible: pages load on demand and are shared with
+    the OS page cache, so a large index costs little resident memory.
+    Mapped indexes are read-only.
+    """
+    if FAISS_MMAP:
+        try:
+            return faiss.read_index(path, _MMAP_FLAGS)
+        except Exception as e:
+            print(f"mmap load of {path} failed, reading into memory: {e}")
+    return faiss.read_index(path)
+
+
+def _fsync_replace(tmp: str, path: str):
+    with open(tmp, "rb+") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _write_index(index, path: str):
+    # readers only ever see a complete file under the final name
+    tmp = path + ".tmp"
+    faiss.write_index(index, tmp)
+    _fsync_replace(tmp, path)
+
 
-model = SentenceTransformer(MODEL_NAME)
+def _write_json(data: dict, path: str):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    _fsync_replace(tmp, path)
 
-class EmployeeVectorStore:
-    def __init__(self):
+
+class _Progress:
+    """Throughput of one sync, printed every PROGRESS_INTERVAL seconds."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.embed_started = None
+        self.rows = 0
+        self.to_embed = 0
+        self.done = 0
+        self._last_report = self.started
+
+    def scanned(self, n: int):
+        self.rows += n
+        self._maybe_report()
+
+    def start_embedding(self, total: int):
+        self.embed_started = time.perf_counter()
+        self.to_embed = total
+
+    def embedded(self, n: int):
+        self.done += n
+        self._maybe_report()
+
+    def _rate(self, count: int, since: float) -> float:
+        elapsed = time.perf_counter() - since
+        return count / elapsed if elapsed > 0 else 0.0
+
+    def _maybe_report(self):
+        now = time.perf_counter()
+        if now - self._last_report < PROGRESS_INTERVAL:
+            return
+        self._last_report = now
+        if self.embed_started is None:
+            print(f"[{self.name}] scanned {self.rows} rows ({self._rate(self.rows, self.started):.0f}/s)")
+        else:
+            print(
+                f"[{self.name}] embedded {self.done}/{self.to_embed} rows "
+                f"({self._rate(self.done, self.embed_started):.0f}/s)"
+            )
+
+    def summary(self) -> dict:
+        return {
+            "seconds": round(time.perf_counter() - self.started, 2),
+            "embedded_per_s": round(self._rate(self.done, self.embed_started), 1)
+            if self.embed_started else 0.0,
+        }
+
+
+class VectorCollection:
+    """
+    One collection's vectors in an ID-mapped FAISS index, id = row_id(key_fn(row)).
+
+    Rows live in a MetaStore next to the index, with the content hash of
+    their embedded text (text_fn(row)), so sync() only re-embeds new or
+    changed rows and removes deleted ones by id. Searches read just the
+    rows they return.
+
+    code_field / mobile_field / name_field feed the lexical index (exact
+    code and mobile lookups, name tokens); name_field also provides the
+    "how people ask" queries for score calibration. Any may be None.
+
+    The live index is never modified: a sync works on a private copy,
+    writes it to a new versioned file, then swaps the reference, so
+    searches run without pausing and never see a half-applied change.
+    """
+
+    def __init__(self, name: str, text_fn, key_fn, code_field: str = None,
+                 mobile_field: str = None, name_field: str = None,
+                 off_topic=OFF_TOPIC_QUERIES):
+        self.name = name
+        self.text_fn = text_fn
+        self.key_fn = key_fn
+        self.name_field = name_field
+        self.off_topic = tuple(off_topic)
+        self._lexical_fields = {
+            "code_field": code_field,
+            "mobile_field": mobile_field,
+            "name_field": name_field,
+        }
+        self._manifest_file = os.path.join(DATA_DIR, MANIFEST_FILE_PATTERN.format(name=name))
         self.index = None
-        self.meta = []
+        self._index_path = None
+        self.meta = MetaStore(os.path.join(DATA_DIR, META_FILE_PATTERN.format(name=name)))
+        self.min_score = VECTOR_MIN_SCORE
+        self.lexical = None  # built from the meta store on first search
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()  # one sync/build at a time
+        # results depend on the index, so they're cleared whenever it changes
+        self._results = QueryCache(RESULT_CACHE_SIZE, QUERY_CACHE_TTL)
+        # bumped on every change; persisted with the rows and the manifest
+        self._generation = 0
+        self._dirty = False  # last sync failed part-way: next one is full
         self._load()
 
+    def _reset(self):
+        self.index = None
+        self._index_path = None
+        self._generation = 0
+        self.meta.clear()
+        self.lexical = self._new_lexical()
+
+    def _new_lexical(self, meta: dict = None) -> LexicalIndex:
+        return LexicalIndex(meta, **self._lexical_fields)
+
+    def _index_file(self, generation) -> str:
+        return os.path.join(DATA_DIR, INDEX_FILE_PATTERN.format(name=self.name, generation=generation))
+
     def _load(self):
-        if os.path.exists(INDEX_FILE):
-            self.index = faiss.read_index(INDEX_FILE)
-            with open(META_FILE, "r") as f:
-                self.meta = json.load(f)
+        if not os.path.exists(self._manifest_file):
+            # created on first sync, so startup doesn't need the encoder
+            self._reset()
+            return
+
+        try:
+            with open(self._manifest_file, "r") as f:
+                manifest = json.load(f)
+
+            if (
+                manifest.get("version") != MANIFEST_VERSION
+                or manifest.get("model") != EMBEDDING_SIGNATURE
+            ):
+                print(f"'{self.name}' index is stale (format/model changed); will rebuild")
+                self._reset()
+                return
+
+            path = os.path.join(DATA_DIR, manifest.get("index_file", ""))
+            generation = manifest.get("generation", 0)
+            if not os.path.isfile(path) or self.meta.version() != generation:
+                # a sync was interrupted between writing rows and the manifest
+                print(f"'{self.name}' index and metadata disagree; will rebuild")
+                self._reset()
+                return
+
+            self.index = _read_index(path)
+            ann_index.apply_search_params(self.index)
+            self._index_path = path
+            self._generation = generation
+            if not VECTOR_MIN_SCORE_FIXED:
+                self.min_score = manifest.get("min_score", VECTOR_MIN_SCORE)
+            self._remove_old_versions()
+        except Exception as e:
+            print(f"'{self.name}' index load error, will rebuild: {e}")
+            self._reset()
+
+    def _save_manifest(self):
+        # rows are committed to the meta store by MetaStore.apply()
+        _write_json({
+            "version": MANIFEST_VERSION,
+            "collection": self.name,
+            "model": EMBEDDING_SIGNATURE,
+            "generation": self._generation,
+            "index_file": os.path.basename(self._index_path),
+            "count": self.index.ntotal,
+            "index_kind": ann_index.index_kind(self.index),
+            "min_score": self.min_score,
+        }, self._manifest_file)
+
+    def _remove_old_versions(self):
+        live = os.path.abspath(self._index_path) if self._index_path else None
+        pattern = self._index_file("*")
+        for path in glob.glob(pattern) + glob.glob(pattern + ".tmp"):
+            if os.path.abspath(path) == live:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                # still mapped by a search (Windows); removed on a later pass
+                pass
+
+    def _writable_copy(self):
+        """
+        Private in-memory copy of the live index for incremental changes;
+        a memory-mapped index is read-only, and searches keep using the
+        live one meanwhile.
+        """
+        if self._index_path and os.path.isfile(self._index_path):
+            return faiss.read_index(self._index_path)
+        # clone_index would share a mapped index's storage; this owns it
+        return faiss.deserialize_index(faiss.serialize_index(self.index))
+
+    def build(self, rows) -> dict:
+        """
+        Full rebuild, re-encoding every row. The current index keeps
+        serving searches until the new one is swapped in.
+        """
+        with self._sync_lock:
+            return self._sync(rows, full=True)
+
+    def sync(self, rows) -> dict:
+        """
+        Bring the index in line with `rows`: the full current set, as a list
+        or any iterable (e.g. a generator paging rows out of the DB). Only
+        rows whose embedded text changed are re-encoded, EMBED_BATCH_SIZE
+        at a time, so memory stays bounded however many rows stream in.
+        """
+        with self._sync_lock:
+            return self._sync(rows)
+
+    def _encode(self, texts: list, show_progress_bar: bool = True, pool=None):
+        if not texts:
+            return np.zeros((0, embedding_dim()), dtype="float32")
+        if pool is not None:
+            vectors = get_encoder().encode_multi_process(texts, pool, batch_size=ENCODE_BATCH_SIZE)
+        else:
+            vectors = get_encoder().encode(
+                texts, batch_size=ENCODE_BATCH_SIZE, show_progress_bar=show_progress_bar
+            )
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    def _calibrate(self, index, sample: list) -> float:
+        """
+        Cut-off between what a real lookup scores and what an off-topic
+        utterance scores. Positives: a row's name against its own record
+        (how people ask); negatives: best hit of the off-topic queries.
+        `sample` is a list of (row, embedded text).
+        """
+        if not sample or not self.name_field:
+            return VECTOR_MIN_SCORE
+
+        names = self._encode([normalize_query(str(row.get(self.name_field))) for row, _ in sample], False)
+        records = self._encode([text for _, text in sample], False)
+        positives = np.sum(names * records, axis=1)
+
+        negatives, _ = index.search(self._encode(list(self.off_topic), False), 1)
+        negatives = negatives[:, 0]
+
+        low_pos = float(np.percentile(positives, 5))
+        high_neg = float(np.max(negatives))
+        if low_pos > high_neg:
+            threshold = (low_pos + high_neg) / 2
         else:
-            self.index = faiss.IndexFlatL2(384)
+            # distributions overlap: favour recall, keep ~95% of real matches
+            threshold = low_pos
+        return round(min(max(threshold, 0.0), 1.0), 4)
+
+    def _embedded_batches(self, ids: list, progress: "_Progress"):
+        """
+        (ids, vectors) for `ids`, EMBED_BATCH_SIZE at a time. Texts come from
+        the meta store, which already holds the new rows at this point.
+        """
+        pool = None
+        if EMBED_PROCESSES > 0 and len(ids) > EMBED_BATCH_SIZE:
+            try:
+                pool = get_encoder().start_multi_process_pool(["cpu"] * EMBED_PROCESSES)
+            except Exception as e:
+                print(f"Embedding process pool unavailable, encoding in-process: {e}")
+        try:
+            for start in range(0, len(ids), EMBED_BATCH_SIZE):
+                chunk = ids[start:start + EMBED_BATCH_SIZE]
+                rows = self.meta.get_many(chunk)
+                chunk = [eid for eid in chunk if eid in rows]
+                vectors = self._encode([self.text_fn(rows[eid]) for eid in chunk], False, pool)
+                progress.embedded(len(chunk))
+                yield np.array(chunk, dtype="int64"), vectors
+        finally:
+            if pool is not None:
+                get_encoder().stop_multi_process_pool(pool)
+
+    def _rebuilt_index(self, kind: str, seen: set, to_embed: list, progress: "_Progress"):
+        """
+        Fresh index of `kind` holding every current row, filled batch by
+        batch. Vectors of unchanged rows are copied out of the old index
+        when it stores them exactly; everything else is (re-)encoded.
+        """
+        embed = set(to_embed)
+        old_ids = ann_index.exact_ids(self.index) if self.index is not None else None
+        reused = set()
+        if old_ids is not None:
+            reused = {int(i) for i in old_ids if int(i) in seen and int(i) not in embed}
+        encode_ids = [eid for eid in seen if eid not in reused]
+
+        def _batches():
+            if reused:
+                for ids, vectors in ann_index.iter_exact_vectors(self.index, EMBED_BATCH_SIZE):
+                    keep = np.array([int(i) in reused for i in ids], dtype=bool)
+                    yield ids[keep], vectors[keep]
+            yield from self._embedded_batches(encode_ids, progress)
+
+        return ann_index.build_index_from_batches(
+            kind, embedding_dim(), _batches(), metric=METRIC, n_total=len(seen)
+        )
+
+    def _sync(self, rows, full: bool = False) -> dict:
+        progress = _Progress(self.name)
+        # a failed sync may have left rows newer than their vectors
+        full = full or self._dirty
+        self._dirty = True
+
+        known = self.meta.hashes()  # id -> (text hash, row hash)
+        generation = self._generation + 1
+
+        # pass 1, streaming: diff every row against the stored hashes and
+        # write new / changed rows in batches; only ids are kept
+        seen = set()
+        changed, added = [], []
+        upserts, n_upserts = {}, 0
+        lexical = self._new_lexical()
+        sample, rng = [], random.Random(generation)
+        for row in rows:
+            eid = row_id(self.key_fn(row))
+            if eid in seen:
+                continue
+            seen.add(eid)
+            text = self.text_fn(row)
+            th, rh = _content_hash(text), _row_hash(row)
+            lexical.add(eid, row)
+            # reservoir sample of rows for score calibration
+            if len(sample) < CALIBRATION_SAMPLE:
+                sample.append((row, text))
+            else:
+                slot = rng.randrange(len(seen))
+                if slot < CALIBRATION_SAMPLE:
+                    sample[slot] = (row, text)
+
+            old = known.get(eid)
+            if old is None:
+                added.append(eid)
+            elif old[0] != th:
+                changed.append(eid)
+            # rows to (re)write, including metadata-only edits (e.g. a new
+            # mobile number changes the text, a new LocCode only the row)
+            if full or old is None or old[1] != rh:
+                upserts[eid] = (row, th, rh)
+            if len(upserts) >= EMBED_BATCH_SIZE:
+                # rows first: searches skip ids whose row is missing, so a
+                # new vector never lands without its row. The version stored
+                # with them won't match the manifest until the end, so a
+                # crash in between forces a rebuild on the next start.
+                self.meta.apply(upserts, [], version=generation)
+                n_upserts += len(upserts)
+                upserts = {}
+            progress.scanned(1)
+
+        removed = [eid for eid in known if eid not in seen]
+        meta_changed = bool(n_upserts or upserts or removed)
+        to_embed = list(seen) if full else changed + added
+        stale = removed + changed
+
+        # the right index type depends on corpus size; HNSW can't delete
+        kind = ann_index.choose_kind(len(seen))
+        rebuild = (
+            full
+            or self.index is None
+            or ann_index.index_kind(self.index) != kind
+            or (stale and not ann_index.supports_remove(self.index))
+        )
+        vectors_changed = rebuild or stale or to_embed
+        if not (vectors_changed or meta_changed):
+            self._dirty = False
+            return {"added": 0, "updated": 0, "removed": 0, "unchanged": len(seen)}
+
+        # a removed row briefly still in the index is harmless
+        self.meta.apply(upserts, removed, version=generation)
+
+        # pass 2: embed in batches into an index off the live one, so
+        # searches keep running meanwhile
+        progress.start_embedding(len(to_embed))
+        new_index = None
+        if rebuild:
+            new_index = self._rebuilt_index(kind, seen, to_embed, progress)
+        elif vectors_changed:
+            new_index = self._writable_copy()
+            if stale:
+                new_index.remove_ids(np.array(stale, dtype="int64"))
+            for ids, vectors in self._embedded_batches(to_embed, progress):
+                new_index.add_with_ids(vectors, ids)
+
+        min_score = self.min_score
+        if new_index is not None and not VECTOR_MIN_SCORE_FIXED:
+            try:
+                min_score = self._calibrate(new_index, sample)
+            except Exception as e:
+                print(f"Score calibration failed, keeping {self.min_score}: {e}")
+
+        index, path = self.index, self._index_path
+        if new_index is not None:
+            os.makedirs(DATA_DIR, exist_ok=True)
+            path = self._index_file(generation)
+            _write_index(new_index, path)
+            # serve the mapped file rather than the in-memory build
+            del new_index
+            index = _read_index(path)
+            ann_index.apply_search_params(index)
+
+        with self._lock:
+            self.index = index
+            self._index_path = path
+            self.min_score = min_score
+            self.lexical = lexical
+            self._generation = generation
+            self._results.clear()
+
+        self._save_manifest()
+        self._remove_old_versions()
+        self._dirty = False
+
+        return {
+            "added": len(added),
+            "updated": len(changed),
+            "removed": len(removed),
+            "unchanged": len(seen) - len(to_embed),
+            **progress.summary(),
+        }
+
+    def _encode_query(self, key: str):
+        q_vec = _query_vectors.get(key)
+        if q_vec is None:
+            q_vec = self._encode([key], show_progress_bar=False)
+            _query_vectors.put(key, q_vec)
+        return q_vec
+
+    def cache_stats(self) -> dict:
+        return {
+            "query_vectors": _query_vectors.stats(),
+            "results": self._results.stats(),
+            "min_score": self.min_score,
+        }
+
+    def _lexical_index(self) -> LexicalIndex:
+        with self._lock:
+            if self.lexical is None:
+                self.lexical = self._new_lexical(dict(self.meta.rows()))
+            return self.lexical
+
+    def _hit(self, rows: dict, eid: int, score, match: str):
+        # rows come straight from the meta store, so no copy is needed
+        row = rows.get(eid)
+        if row is None:
+            return None
+        row["_score"] = score
+        row["_match"] = match
+        return row
+
+    def search(self, query: str, top_k=5, min_score: float = None):
+        """
+        Hybrid lookup.
+
+        1. Exact code / mobile / full-name hits from the lexical index are
+           returned straight away, without running the encoder.
+        2. Otherwise vector hits (cosine >= `min_score`, default: the
+           calibrated cut-off) and name-token matches (exact, phonetic,
+           prefix) are merged with reciprocal rank fusion. When no vector
+           hit passes `min_score`, only exact name-token matches are kept.
+        """
+        try:
+            key = normalize_query(query)
+            with self._lock:
+                index = self.index
+                generation = self._generation
+            if not key or index is None or index.ntotal == 0:
+                return []
+
+            if min_score is None:
+                min_score = self.min_score
+
+            cached = self._results.get((key, top_k, min_score))
+            if cached is not None:
+                return [row.copy() for row in cached]
+
+            lexical = self._lexical_index()
+            exact = lexical.exact(key)
+            if exact:
+                exact = exact[:top_k]
+                rows = self.meta.get_many(exact)
+                results = [self._hit(rows, eid, 1.0, "exact") for eid in exact]
+            else:
+                q_vec = self._encode_query(key)
+
+                # a concurrent sync swaps self.index; this search finishes
+                # on the snapshot it started with
+                scores, ids = index.search(q_vec, top_k * 2)
+
+                vector_scores = {
+                    int(eid): float(score)
+                    for score, eid in zip(scores[0], ids[0])
+                    if eid >= 0 and score >= min_score
+                }
+                lexical_ranked = lexical.ranked(key)
+                if not vector_scores:
+                    # nothing passed min_score: a phonetic / prefix match
+                    # alone isn't evidence the query is about a person
+                    named = lexical.named(key)
+                    lexical_ranked = [eid for eid in lexical_ranked if eid in named]
+                lexical_ranked = lexical_ranked[: top_k * 2]
+                lexical_set = set(lexical_ranked)
+
+                results = []
+                fused = reciprocal_rank_fusion(list(vector_scores), lexical_ranked)[:top_k]
+                rows = self.meta.get_many([eid for eid, _ in fused])
+                for eid, _ in fused:
+                    if eid in vector_scores:
+                        match = "hybrid" if eid in lexical_set else "vector"
+                    else:
+                        match = "lexical"
+                    results.append(self._hit(rows, eid, vector_scores.get(eid), match))
+
+            results = [row for row in results if row is not None]
+
+            with self._lock:
+                # don't cache results computed against an index that was
+                # replaced while we were searching
+                if generation == self._generation:
+                    self._results.put((key, top_k, min_score), [row.copy() for row in results])
+            return results
+        except Exception as e:
+            print(f"Vector search error ({self.name}): {e}")
+            return []
+
 
-    def build(self, employees: list):
-        self.index = faiss.IndexFlatL2(384)
-        self.meta = []
+# =========================
+# COLLECTIONS
+# =========================
+# name -> zero-arg factory, registered by the module that owns the entity
+_factories = {}
+_collections = {}
+_registry_lock = threading.Lock()
 
-        texts = []
-        for emp in employees:
-            text = f"""
-            Empno {emp['EmpNo']}
-            Employee {emp['FirstName']}
-            Designation {emp['Designation']}
-            Department {emp['DeptName']}
-            Mobile {emp['EmployeeMobile']}
-            """
-            texts.append(text)
-            self.meta.append(emp)
 
-        vectors = model.encode(texts)
-        self.index.add(np.array(vectors).astype("float32"))
+def register(name: str, factory):
+    """Register how to open a collection. Nothing is loaded until get()."""
+    with _registry_lock:
+        if name in _factories and _factories[name] is not factory:
+            raise ValueError(f"Collection '{name}' is already registered")
+        _factories[name] = factory
 
-        os.makedirs("data", exist_ok=True)
-        faiss.write_index(self.index, INDEX_FILE)
 
-        with open(META_FILE, "w") as f:
-            json.dump(self.meta, f)
+def get(name: str) -> VectorCollection:
+    """Return the collection, opening it on first use."""
+    with _registry_lock:
+        if name not in _collections:
+            try:
+                factory = _factories[name]
+            except KeyError:
+                raise KeyError(f"Unknown collection: {name}")
+            _collections[name] = factory()
+        return _collections[name]
 
-def search(self, query: str, top_k=5, max_distance=0.75):
-    if self.index.ntotal == 0:
-        return []
 
-    q_vec = model.encode([query]).astype("float32")
-    distances, indices = self.index.search(q_vec, top_k)
+def names() -> list:
+    return list(_factories)
 
-    results = []
 
-    for dist, idx in zip(distances[0], indices[0]):
-        if idx < 0 or idx >= len(self.meta):
-            continue
-        if dist > max_distance:
-            continue
+def search(name: str, query: str, top_k: int = 5, min_score: float = None) -> list:
+    return get(name).search(query, top_k=top_k, min_score=min_score)
 
-        emp = self.meta[idx].copy()
-        emp["_score"] = float(dist)
-        results.append(emp)
 
-    return results
+def stats() -> dict:
+    """Cache / cut-off stats of the collections opened so far."""
+    return {name: coll.cache_stats() for name, coll in list(_collections.items())}
@@ -3,34 +3,45 @@ import json
 import base64
 import os
 import uuid
+import struct
 import logging
 from typing import Optional
 
 import websockets
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 
 # =========================
 # IMPORT YOUR EXISTING LOGIC
 # =========================
-from whisper_wrapper import transcribe_audio
-from piper_tts import synthesize
+from whisper_wrapper import transcribe_audio, transcribe_pcm, stt_stats
+from audio_stream import AudioStreamSession, WHISPER_SAMPLE_RATE
+from audio_stream import decode_audio_bytes, AudioDecodeError, AudioTooLongError
+from piper_tts import synthesize, synthesize_wav, split_sentences, warm_up as warm_up_tts
+from piper_tts import prewarm_texts, cache_stats as tts_cache_stats
 
 from ai_agent.intent_engine import detect_intent
-from ai_agent.agent import generate_reply
+from ai_agent.agent import generate_reply, STATIC_REPLIES
 from ai_agent.llm_agent import call_llm
 
+import model_registry
+from scheduler import run_stage, stage_stats, StageBusyError
+from scheduler import shutdown as shutdown_stages
+
 from database.employeeDetails import router as employeeDetails_router
-from database.getEmployees import router as getEmployees_router
+from database.getEmployees import router as getEmployees_router, iter_employees, INDEX_COLUMNS
 from database.report import router as report_router
+from database import report_jobs
 
 
-from ai_agent.employee_store import EmployeeVectorStore
+from ai_agent import vector_store
+from ai_agent.employee_store import COLLECTION as EMPLOYEE_COLLECTION
 import requests
 
 
-from database.database import get_db, DATABASES
-from sqlalchemy import text
+from database.database import DATABASES, pool_stats
+from database.database import warm_up as warm_up_db
+from database import employee_cache
 
 
 # =========================
@@ -41,11 +52,24 @@ WS_PORT = int(os.environ.get("WS_PORT", 8000))
 HTTP_PORT = int(os.environ.get("HTTP_PORT", 8001))
 
 TTS_ENABLED = os.environ.get("ENABLE_TTS", "1") != "0"
+# default for clients that don't send "stream_audio" themselves
+TTS_STREAM_DEFAULT = os.environ.get("TTS_STREAM", "0") == "1"
 STT_TEMP_DIR = os.environ.get("TMP_DIR", "./tmp")
 MAX_AUDIO_FILE_BYTES = 20 * 1024 * 1024
+# write uploads to STT_TEMP_DIR only when they can't be decoded in memory
+STT_DISK_FALLBACK = os.environ.get("STT_DISK_FALLBACK", "1") != "0"
 LLM_CONFIDENCE_THRESHOLD = float(os.environ.get("LLM_CONFIDENCE_THRESHOLD", 0.6))
+# rows fetched per DB round trip while (re)building the employee index
+INDEX_BUILD_PAGE_SIZE = int(os.environ.get("INDEX_BUILD_PAGE_SIZE", 1000))
+# same as passing --warmup: load all models in the background at startup
+WARMUP_MODELS = os.environ.get("WARMUP_MODELS", "0") == "1"
+
+# fixed replies produced here rather than by agent.generate_reply
+REPLY_RULE_FAILED = "I encountered an issue processing your request."
+REPLY_LLM_FAILED = "I couldn't process that request."
+SYSTEM_REPLIES = (REPLY_RULE_FAILED, REPLY_LLM_FAILED)
 
-employee_store = EmployeeVectorStore()
+employee_store = vector_store.get(EMPLOYEE_COLLECTION)
 
 
 # =========================
@@ -77,6 +101,7 @@ app.add_middleware(
 app.include_router(employeeDetails_router, prefix="/api", tags=["employeeDetails"])
 app.include_router(getEmployees_router, prefix="/api", tags=["getEmployees_router"])
 app.include_router(report_router, prefix="/api", tags=["reports"])
+app.include_router(report_jobs.router, prefix="/api", tags=["reports"])
 
 
 @app.get("/")
@@ -84,6 +109,40 @@ def root():
     return {"message": "Hybrid AI Backend Running"}
 
 
+@app.get("/health/stages")
+def stages_health():
+    return {
+        "status": True,
+        "stages": stage_stats(),
+        "stt": stt_stats(),
+        "tts_cache": tts_cache_stats(),
+        "vector_search": vector_store.stats(),
+        "report_jobs": report_jobs.stats(),
+    }
+
+
+@app.get("/health/db")
+def db_health():
+    return {"status": True, "pools": pool_stats(), "employee_cache": employee_cache.stats()}
+
+
+@app.get("/health/models")
+def models_health():
+    return {"status": True, "models": model_registry.status()}
+
+
+@app.get("/api/search/{collection}")
+async def search_collection(collection: str, q: str, top_k: int = Query(5, ge=1, le=50)):
+    """Hybrid search over any registered vector collection."""
+    if collection not in vector_store.names():
+        raise HTTPException(status_code=404, detail=f"Unknown collection: {collection}")
+    try:
+        results = await run_stage("embedding", vector_store.search, collection, q, top_k=top_k)
+    except StageBusyError:
+        raise HTTPException(status_code=503, detail="Search is busy, try again")
+    return {"status": True, "count": len(results), "data": results}
+
+
 # =========================
 # UTIL FUNCTIONS
 # =========================
@@ -102,6 +161,170 @@ def _safe_remove(path: str):
         pass
 
 
+def _transcribe_upload(audio_bytes: bytes) -> str:
+    """Decode + transcribe a one-shot upload in memory (runs on the STT stage)."""
+    try:
+        samples = decode_audio_bytes(audio_bytes)
+    except AudioTooLongError:
+        raise
+    except AudioDecodeError as e:
+        if not STT_DISK_FALLBACK:
+            raise
+        logger.warning(f"In-memory decode failed ({e}), falling back to disk")
+        path = _safe_write_tempfile(audio_bytes)
+        try:
+            return transcribe_audio(path)
+        finally:
+            _safe_remove(path)
+
+    return transcribe_pcm(samples)
+
+
+async def _send_busy(ws, stage: str):
+    logger.warning("Stage '%s' at capacity, rejecting request", stage)
+    await ws.send(json.dumps({
+        "type": "error",
+        "message": "Server is busy. Please try again in a moment.",
+        "meta": {"source": "system", "stage": stage, "confidence": 0.0},
+    }))
+
+
+async def _synthesize_reply(reply: str):
+    # TTS is optional: when its pool is saturated we degrade to a text-only
+    # reply instead of failing the whole request
+    try:
+        return await run_stage("tts", synthesize, reply)
+    except StageBusyError:
+        logger.warning("TTS stage at capacity, sending text-only reply")
+    except Exception as e:
+        logger.error(f"TTS error: {e}")
+    return None
+
+
+def _audio_chunk_frame(header: dict, audio: bytes) -> bytes:
+    # binary frame: 4-byte big-endian header length | JSON header | WAV bytes
+    head = json.dumps(header).encode("utf-8")
+    return struct.pack(">I", len(head)) + head + audio
+
+
+async def _stream_reply_audio(ws, sentences: list):
+    """
+    Synthesize the reply sentence by sentence and push each clip as soon as
+    it is ready. The next sentence is synthesized while the current one is
+    being sent/played, and one reply never holds more than one TTS worker.
+    """
+    total = len(sentences)
+    sent = 0
+    truncated = False
+    task = None
+
+    try:
+        if total:
+            task = asyncio.ensure_future(run_stage("tts", synthesize_wav, sentences[0]))
+
+        for seq in range(total):
+            try:
+                wav = await task
+            except StageBusyError:
+                logger.warning("TTS stage at capacity, truncating audio stream")
+                truncated = True
+                task = None
+                break
+            except Exception as e:
+                logger.error(f"TTS error: {e}")
+                wav = b""
+
+            task = None
+            if seq + 1 < total:
+                task = asyncio.ensure_future(
+                    run_stage("tts", synthesize_wav, sentences[seq + 1])
+                )
+
+            if not wav:
+                continue
+
+            await ws.send(_audio_chunk_frame({
+                "type": "audio_chunk",
+                "seq": seq,
+                "total": total,
+                "format": "wav",
+                "text": sentences[seq],
+            }, wav))
+            sent += 1
+
+        await ws.send(json.dumps({
+            "type": "audio_end",
+            "chunks": sent,
+            "truncated": truncated,
+        }))
+    finally:
+        if task is not None:
+            task.cancel()
+
+
+async def _send_reply(ws, payload: dict, want_voice_reply: bool, stream_audio: bool):
+    reply = payload.get("reply") or ""
+    payload["audio"] = None
+
+    if not (want_voice_reply and TTS_ENABLED and reply):
+        await ws.send(json.dumps(payload))
+        return
+
+    if not stream_audio:
+        payload["audio"] = await _synthesize_reply(reply)
+        await ws.send(json.dumps(payload))
+        return
+
+    # streaming: text reply goes out immediately, audio follows as chunks
+    sentences = split_sentences(reply)
+    payload["audio_stream"] = True
+    payload["audio_chunks"] = len(sentences)
+    await ws.send(json.dumps(payload))
+    await _stream_reply_audio(ws, sentences)
+
+
+# =========================
+# REPORT JOBS
+# =========================
+def _submit_report_job():
+    try:
+        job, reused = report_jobs.submit("xlsx")
+    except HTTPException as e:
+        logger.warning("Report job not queued: %s", e.detail)
+        return None
+    if reused:
+        logger.info("Report job %s reused (%s)", job.id, job.status)
+    return job
+
+
+# per connection: tasks waiting to push report_ready, cancelled on disconnect
+_report_pushes = {}
+
+
+def _watch_report(ws, job):
+    task = asyncio.ensure_future(_push_report_ready(ws, job))
+    tasks = _report_pushes.setdefault(ws, set())
+    tasks.add(task)
+    task.add_done_callback(tasks.discard)
+
+
+async def _push_report_ready(ws, job):
+    # the report is generated in the background; tell this client when it's there
+    await job.done.wait()
+    if job.status == "done":
+        message = {"type": "report_ready", **job.to_dict()}
+    else:
+        message = {
+            "type": "error",
+            "message": "The report could not be generated.",
+            "meta": {"job_id": job.id, "error": job.error},
+        }
+    try:
+        await ws.send(json.dumps(message))
+    except websockets.exceptions.ConnectionClosed:
+        pass
+
+
 # =========================
 # CORE AI PROCESSOR
 # =========================
@@ -109,7 +332,9 @@ def _safe_remove(path: str):
 # CORE AI PROCESSOR
 
 
-async def process_text(ws, user_text: str, want_voice_reply: bool):
+async def process_text(
+    ws, user_text: str, want_voice_reply: bool, stream_audio: bool = False
+):
     try:
         heard_text = user_text
 
@@ -135,38 +360,43 @@ async def process_text(ws, user_text: str, want_voice_reply: bool):
         # 2️⃣ RULE ENGINE (HIGH CONFIDENCE)
         if intent and intent.get("confidence", 0) >= 0.85:
             try:
-                reply = generate_reply(user_text, intent=intent) or ""
+                reply = await run_stage(
+                    "db", generate_reply, user_text, intent=intent
+                ) or ""
+            except StageBusyError:
+                raise
             except Exception as e:
                 logger.error(f"Generate reply failed: {e}")
-                reply = "I encountered an issue processing your request."
+                reply = REPLY_RULE_FAILED
 
-            if reply:
-                audio_b64 = None
+            job = None
+            if reply and intent.get("intent") == "download_sales_report":
+                job = _submit_report_job()
 
-                if want_voice_reply and TTS_ENABLED:
-                    try:
-                        audio_b64 = synthesize(reply)
-                    except Exception as e:
-                        logger.error(f"TTS error: {e}")
-                        audio_b64 = None
-
-                await ws.send(json.dumps({
+            if reply:
+                await _send_reply(ws, {
                     "type": "reply",
                     "reply": reply,
                     "text": heard_text,
-                    "audio": audio_b64,
                     "intent": intent.get("intent"),
                     "params": intent.get("params", {}),
                     "meta": {
                         "source": "rule",
                         "confidence": intent.get("confidence", 0.85),
+                        **({"job_id": job.id} if job else {}),
                     },
-                }))
+                }, want_voice_reply, stream_audio)
+                if job:
+                    _watch_report(ws, job)
                 return
 
         # 3️⃣ FAISS SEARCH
         try:
-            employees = employee_store.search(user_text, top_k=5) or []
+            employees = await run_stage(
+                "embedding", employee_store.search, user_text, top_k=5
+            ) or []
+        except StageBusyError:
+            raise
         except Exception as e:
             logger.error(f"FAISS search failed: {e}")
             employees = []
@@ -176,39 +406,40 @@ async def process_text(ws, user_text: str, want_voice_reply: bool):
 
         # 4️⃣ LLM FALLBACK
         try:
-            llm = call_llm(
+            llm = await run_stage(
+                "llm",
+                call_llm,
                 user_text=user_text,
-                business_context=business_context
+                business_context=business_context,
             ) or {}
+        except StageBusyError:
+            raise
         except Exception as e:
             logger.error(f"LLM call failed: {e}")
             llm = {}
 
-        reply = llm.get("reply") or "I couldn't process that request."
+        reply = llm.get("reply") or REPLY_LLM_FAILED
         llm_intent = llm.get("intent")
         llm_params = llm.get("params", {})
         llm_confidence = llm.get("confidence", 0.0)
 
-        audio_b64 = None
-        if want_voice_reply and TTS_ENABLED:
-            try:
-                audio_b64 = synthesize(reply)
-            except Exception as e:
-                logger.error(f"TTS error: {e}")
-                audio_b64 = None
-
-        await ws.send(json.dumps({
+        await _send_reply(ws, {
             "type": "reply",
             "reply": reply,
             "text": heard_text,
-            "audio": audio_b64,
             "intent": llm_intent,
             "params": llm_params,
             "meta": {
                 "source": source,
                 "confidence": llm_confidence,
             },
-        }))
+        }, want_voice_reply, stream_audio)
+
+    except StageBusyError as e:
+        try:
+            await _send_busy(ws, e.stage)
+        except:
+            pass
 
     except Exception:
         logger.exception("Process text fatal error")
@@ -222,16 +453,111 @@ async def process_text(ws, user_text: str, want_voice_reply: bool):
             pass
 
 
+# =========================
+# STREAMED AUDIO UPLOADS
+# audio_start -> binary audio_chunk frames -> audio_end
+# =========================
+async def _start_audio_stream(ws, data: dict):
+    try:
+        session = AudioStreamSession(
+            sample_rate=int(data.get("sample_rate", WHISPER_SAMPLE_RATE)),
+            encoding=data.get("encoding", "pcm_s16le"),
+        )
+    except (TypeError, ValueError, OverflowError) as e:
+        await ws.send(json.dumps({"type": "error", "message": str(e)}))
+        return None
+
+    session.want_voice_reply = bool(data.get("voice_reply", True))
+    session.stream_audio = bool(data.get("stream_audio", TTS_STREAM_DEFAULT))
+    session.utterances = 0
+
+    await ws.send(json.dumps({
+        "type": "status",
+        "content": "audio_stream_started",
+        "sample_rate": session.sample_rate,
+        "encoding": session.encoding,
+    }))
+    return session
+
+
+async def _partial_transcript(ws, session, utterance_id: int, samples):
+    # best effort: skipped when STT is saturated, dropped if the utterance
+    # has already been finalized
+    try:
+        text = await run_stage("stt", transcribe_pcm, samples, partial=True)
+    except StageBusyError:
+        return
+    except Exception as e:
+        logger.error(f"Partial transcription error: {e}")
+        return
+
+    if text and session.utterance_id == utterance_id:
+        await ws.send(json.dumps({"type": "partial_transcript", "text": text}))
+
+
+async def _finish_utterance(ws, session):
+    if session.partial_task is not None:
+        session.partial_task.cancel()
+        session.partial_task = None
+
+    samples = session.take_utterance()
+    session.utterances += 1
+
+    text = await run_stage("stt", transcribe_pcm, samples) or ""
+    await ws.send(json.dumps({"type": "transcript", "text": text, "final": True}))
+    await process_text(
+        ws, text, session.want_voice_reply, stream_audio=session.stream_audio
+    )
+
+
+async def _feed_audio_stream(ws, session, chunk: bytes):
+    if len(chunk) > MAX_AUDIO_FILE_BYTES:
+        await ws.send(json.dumps({"type": "error", "message": "Audio chunk too large"}))
+        return
+
+    # VAD endpoint: answer as soon as the user stops talking
+    if session.feed(chunk):
+        await _finish_utterance(ws, session)
+        return
+
+    if session.partial_due() and (
+        session.partial_task is None or session.partial_task.done()
+    ):
+        session.partial_task = asyncio.ensure_future(
+            _partial_transcript(ws, session, session.utterance_id, session.snapshot())
+        )
+
+
+async def _end_audio_stream(ws, session):
+    if session.has_speech:
+        await _finish_utterance(ws, session)
+    elif not session.utterances:
+        # nothing was said during the whole stream
+        await process_text(ws, "", session.want_voice_reply)
+
+    await ws.send(json.dumps({"type": "status", "content": "audio_stream_ended"}))
+
+
 # =========================
 # WEBSOCKET HANDLER
 # =========================
 async def ws_handler(ws, path=None):
 
     logger.info("WebSocket connected: %s", ws.remote_address)
+    audio_stream = None
 
     try:
         async for msg in ws:
             try:
+                if isinstance(msg, bytes):
+                    if audio_stream is None:
+                        await ws.send(
+                            json.dumps({"type": "error", "message": "No active audio stream"})
+                        )
+                    else:
+                        await _feed_audio_stream(ws, audio_stream, msg)
+                    continue
+
                 data = json.loads(msg)
                 msg_type = data.get("type")
 
@@ -272,12 +598,19 @@ async def ws_handler(ws, path=None):
                             )
                             continue
 
-                        path = _safe_write_tempfile(audio_bytes)
-                        try:
-                            text = transcribe_audio(path) or ""
-                            await process_text(ws, text, True)
-                        finally:
-                            _safe_remove(path)
+                        text = await run_stage("stt", _transcribe_upload, audio_bytes) or ""
+                        await process_text(
+                            ws,
+                            text,
+                            True,
+                            stream_audio=data.get("stream_audio", TTS_STREAM_DEFAULT),
+                        )
+                    except StageBusyError as e:
+                        await _send_busy(ws, e.stage)
+                    except AudioTooLongError:
+                        await ws.send(
+                            json.dumps({"type": "error", "message": "Audio too long"})
+                        )
                     except Exception as e:
                         logger.error(f"Audio processing error: {e}")
                         await ws.send(
@@ -309,12 +642,14 @@ async def ws_handler(ws, path=None):
                             )
                             continue
 
-                        path = _safe_write_tempfile(audio_bytes)
-                        try:
-                            text = transcribe_audio(path) or ""
-                            await process_text(ws, text, False)
-                        finally:
-                            _safe_remove(path)
+                        text = await run_stage("stt", _transcribe_upload, audio_bytes) or ""
+                        await process_text(ws, text, False)
+                    except StageBusyError as e:
+                        await _send_busy(ws, e.stage)
+                    except AudioTooLongError:
+                        await ws.send(
+                            json.dumps({"type": "error", "message": "Audio too long"})
+                        )
                     except Exception as e:
                         logger.error(f"Audio to text error: {e}")
                         await ws.send(
@@ -326,11 +661,36 @@ async def ws_handler(ws, path=None):
                             )
                         )
 
+                elif msg_type == "audio_start":
+                    audio_stream = await _start_audio_stream(ws, data)
+
+                elif msg_type == "audio_chunk":
+                    # base64 variant for clients that can't send binary frames
+                    if audio_stream is None:
+                        await ws.send(
+                            json.dumps({"type": "error", "message": "No active audio stream"})
+                        )
+                        continue
+                    await _feed_audio_stream(
+                        ws, audio_stream, base64.b64decode(data.get("audio", ""))
+                    )
+
+                elif msg_type == "audio_end":
+                    if audio_stream is None:
+                        await ws.send(
+                            json.dumps({"type": "error", "message": "No active audio stream"})
+                        )
+                        continue
+                    session, audio_stream = audio_stream, None
+                    await _end_audio_stream(ws, session)
+
                 else:
                     await ws.send(
                         json.dumps({"type": "error", "message": "Unknown message type"})
                     )
 
+            except StageBusyError as e:
+                await _send_busy(ws, e.stage)
             except json.JSONDecodeError as e:
                 logger.error(f"JSON decode error: {e}")
                 await ws.send(
@@ -345,6 +705,10 @@ async def ws_handler(ws, path=None):
     except Exception:
         logger.exception("WebSocket error")
     finally:
+        if audio_stream is not None and audio_stream.partial_task is not None:
+            audio_stream.partial_task.cancel()
+        for task in _report_pushes.pop(ws, ()):
+            task.cancel()
         logger.info("WebSocket disconnected: %s", ws.remote_address)
 
 
@@ -353,15 +717,21 @@ async def ws_handler(ws, path=None):
 # =========================
 def build_employee_index():
     try:
-        res = requests.get(
-            "http://127.0.0.1:8001/api/employees", params={"limit": 50, "offset": 0}
-        )
-
-        employees = res.json().get("data", [])
+        # the whole directory as NDJSON, streamed into the build page by page
+        with requests.get(
+            "http://127.0.0.1:8001/api/employees",
+            params={"format": "ndjson", "limit": INDEX_BUILD_PAGE_SIZE, "fields": INDEX_COLUMNS},
+            stream=True,
+        ) as res:
+            if res.status_code == 404:
+                logger.warning("No employees found for FAISS")
+                return
+            res.raise_for_status()
+            stats = employee_store.build(json.loads(line) for line in res.iter_lines() if line)
 
-        if employees:
-            employee_store.build(employees)
-            logger.info("FAISS index built with %d employees", len(employees))
+        total = stats["added"] + stats["updated"] + stats["unchanged"]
+        if total:
+            logger.info("FAISS index built with %d employees", total)
         else:
             logger.warning("No employees found for FAISS")
 
@@ -369,37 +739,93 @@ def build_employee_index():
         logger.exception("FAISS build failed: %s", e)
 
 
-def build_employee_index_from_db():
-    employees = []
-
+def _iter_all_employees():
     for db_key in DATABASES.keys():
-        db = next(get_db(db_key))
-
-        rows = db.execute(
-            text(
-                """
-            SELECT EmpNo, EmployeeMobile, FirstName, Designation, DeptName
-            FROM Employee_Mst
-        """
-            )
-        ).fetchall()
-
-        for r in rows:
-            emp = dict(r._mapping)
-            emp["db_key"] = db_key
-            employees.append(emp)
-
-    if employees:
-        employee_store.build(employees)
-        logger.info("FAISS built with %d employees", len(employees))
+        yield from iter_employees(db_key, INDEX_BUILD_PAGE_SIZE)
+
+
+def build_employee_index_from_db():
+    # rows stream page by page from every DB straight into the index sync
+    stats = employee_store.sync(_iter_all_employees())
+    total = stats["added"] + stats["updated"] + stats["unchanged"]
+    if total:
+        logger.info(
+            "FAISS synced with %d employees (added %d, updated %d, removed %d) "
+            "in %.1fs, %.0f embedded/s",
+            total, stats["added"], stats["updated"], stats["removed"],
+            stats.get("seconds", 0), stats.get("embedded_per_s", 0),
+        )
     else:
         logger.warning("No employees found for FAISS")
 
 
-async def start_servers():
+async def _sync_employee_index():
+    loop = asyncio.get_running_loop()
+
+    # connect every DB up front: the index sync needs them anyway, and a
+    # bad connection string shows up here rather than on a user request
+    results = await loop.run_in_executor(None, warm_up_db)
+    for db_key, error in results.items():
+        if error:
+            logger.error("Database %s unavailable: %s", db_key, error)
+        else:
+            logger.info("Database %s connected", db_key)
+
+    # its own thread rather than the "db" stage: a long sync must not hold
+    # a slot that user requests need
+    try:
+        await loop.run_in_executor(None, build_employee_index_from_db)
+    except Exception:
+        logger.exception("Employee index sync failed")
+
+
+async def _warm_up_tts():
+    try:
+        await run_stage("tts", warm_up_tts)
+        logger.info("Piper voices loaded")
+    except Exception as e:
+        logger.error(f"TTS warm-up failed: {e}")
+        return
+
+    # one text per call so live requests interleave with the pre-warm
+    pending = prewarm_texts(STATIC_REPLIES + SYSTEM_REPLIES)
+    for text in pending:
+        try:
+            await run_stage("tts", synthesize_wav, text)
+        except StageBusyError:
+            await asyncio.sleep(1)
+        except Exception as e:
+            logger.error(f"TTS cache pre-warm failed: {e}")
+            return
+    logger.info("TTS cache pre-warmed with %d clips", len(pending))
+
+
+async def _warm_up_models():
+    names = [n for n in model_registry.status() if TTS_ENABLED or n != "piper"]
+    loop = asyncio.get_running_loop()
+    # parallel load on its own threads, so serving never waits on it
+    errors = await loop.run_in_executor(None, model_registry.warm_up, names)
+    failed = {name: err for name, err in errors.items() if err}
+    if failed:
+        logger.error("Model warm-up failures: %s", failed)
+    else:
+        logger.info("Models warmed up: %s", ", ".join(names))
+
+
+async def start_servers(warmup: bool = False):
     import uvicorn
 
-    build_employee_index_from_db()
+    # servers start right away; the index keeps serving its last saved
+    # generation until the sync swaps in the new one
+    asyncio.ensure_future(_sync_employee_index())
+    # expired report files, including any a previous run left behind
+    report_jobs.start()
+
+    if warmup:
+        asyncio.ensure_future(_warm_up_models())
+
+    if TTS_ENABLED:
+        asyncio.ensure_future(_warm_up_tts())
 
     ws_server = await websockets.serve(ws_handler, HOST, WS_PORT)
     logger.info("WebSocket running on ws://%s:%s", HOST, WS_PORT)
@@ -415,11 +841,26 @@ async def start_servers():
 
     server = uvicorn.Server(config)
 
-    await server.serve()
+    try:
+        await server.serve()
+    finally:
+        report_jobs.shutdown()
+        shutdown_stages()
 
 
 # =========================
 # ENTRY POINT
 # =========================
 if __name__ == "__main__":
-    asyncio.run(start_servers())
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Hybrid AI Backend")
+    parser.add_argument(
+        "--warmup",
+        action="store_true",
+        help="load Whisper, the embedding model, Groq client and Piper voices "
+        "in parallel background threads at startup instead of on first use",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(start_servers(warmup=args.warmup or WARMUP_MODELS))
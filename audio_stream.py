@@ -0,0 +1,284 @@
+import io
+import os
+import wave
+import numpy as np
+
+# Whisper works on 16 kHz mono float32
+WHISPER_SAMPLE_RATE = 16000
+
+STREAM_MAX_SECONDS = float(os.environ.get("STREAM_MAX_SECONDS", 30))
+STREAM_PREROLL_MS = int(os.environ.get("STREAM_PREROLL_MS", 300))
+STREAM_PARTIAL_INTERVAL_MS = int(os.environ.get("STREAM_PARTIAL_INTERVAL_MS", 1000))
+
+VAD_FRAME_MS = 30
+VAD_ENERGY_THRESHOLD = float(os.environ.get("VAD_ENERGY_THRESHOLD", 0.01))
+VAD_MIN_SPEECH_MS = int(os.environ.get("VAD_MIN_SPEECH_MS", 200))
+VAD_END_SILENCE_MS = int(os.environ.get("VAD_END_SILENCE_MS", 700))
+
+SUPPORTED_ENCODINGS = ("pcm_s16le", "pcm_f32le")
+# client-declared rates outside this range are refused; the rate sizes the
+# per-connection ring buffer
+MIN_STREAM_SAMPLE_RATE = 8000
+MAX_STREAM_SAMPLE_RATE = 48000
+
+# longest clip a one-shot upload may decode to
+MAX_DECODE_SECONDS = float(os.environ.get("MAX_DECODE_SECONDS", 120))
+
+
+class AudioDecodeError(Exception):
+    pass
+
+
+class AudioTooLongError(AudioDecodeError):
+    pass
+
+
+def pcm_to_float32(data: bytes, encoding: str = "pcm_s16le") -> np.ndarray:
+    if encoding == "pcm_f32le":
+        return np.frombuffer(data[: len(data) - len(data) % 4], dtype="<f4").copy()
+    samples = np.frombuffer(data[: len(data) - len(data) % 2], dtype="<i2")
+    return samples.astype(np.float32) / 32768.0
+
+
+def resample(samples: np.ndarray, src_rate: int, dst_rate: int = WHISPER_SAMPLE_RATE) -> np.ndarray:
+    """Linear-interpolation resampler; plenty for speech recognition."""
+    if src_rate == dst_rate or len(samples) == 0:
+        return samples
+    n_out = int(round(len(samples) * dst_rate / src_rate))
+    x_out = np.linspace(0, len(samples) - 1, n_out, dtype=np.float64)
+    return np.interp(x_out, np.arange(len(samples)), samples).astype(np.float32)
+
+
+class PCMRingBuffer:
+    """
+    Fixed-capacity float32 ring. Positions are absolute sample counts since
+    the stream started, so readers can keep a start marker across wraps.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self._buf = np.zeros(self.capacity, dtype=np.float32)
+        self.written = 0
+
+    def write(self, samples: np.ndarray):
+        n = len(samples)
+        if n == 0:
+            return
+        if n > self.capacity:
+            self.written += n - self.capacity
+            samples = samples[-self.capacity:]
+            n = self.capacity
+
+        idx = self.written % self.capacity
+        first = min(n, self.capacity - idx)
+        self._buf[idx: idx + first] = samples[:first]
+        if first < n:
+            self._buf[: n - first] = samples[first:]
+        self.written += n
+
+    def oldest(self) -> int:
+        return max(0, self.written - self.capacity)
+
+    def read(self, start: int) -> np.ndarray:
+        start = max(start, self.oldest())
+        n = self.written - start
+        if n <= 0:
+            return np.zeros(0, dtype=np.float32)
+
+        idx = start % self.capacity
+        if idx + n <= self.capacity:
+            return self._buf[idx: idx + n].copy()
+        return np.concatenate((self._buf[idx:], self._buf[: n - (self.capacity - idx)]))
+
+
+class AudioStreamSession:
+    """
+    One chunked upload (audio_start -> audio_chunk... -> audio_end).
+
+    PCM is appended to a ring buffer while a simple energy VAD tracks the
+    current utterance: leading silence is trimmed to a short pre-roll, and
+    the utterance ends after VAD_END_SILENCE_MS of trailing silence or when
+    the buffer is full.
+    """
+
+    def __init__(self, sample_rate: int = WHISPER_SAMPLE_RATE, encoding: str = "pcm_s16le"):
+        if encoding not in SUPPORTED_ENCODINGS:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+        if not MIN_STREAM_SAMPLE_RATE <= sample_rate <= MAX_STREAM_SAMPLE_RATE:
+            raise ValueError(
+                f"Invalid sample rate: {sample_rate} "
+                f"(must be {MIN_STREAM_SAMPLE_RATE}-{MAX_STREAM_SAMPLE_RATE} Hz)"
+            )
+
+        self.sample_rate = sample_rate
+        self.encoding = encoding
+        self.ring = PCMRingBuffer(int(sample_rate * STREAM_MAX_SECONDS))
+
+        self._frame = max(1, sample_rate * VAD_FRAME_MS // 1000)
+        self._preroll = sample_rate * STREAM_PREROLL_MS // 1000
+        self._min_speech = sample_rate * VAD_MIN_SPEECH_MS // 1000
+        self._end_silence = sample_rate * VAD_END_SILENCE_MS // 1000
+        self._partial_interval = sample_rate * STREAM_PARTIAL_INTERVAL_MS // 1000
+
+        self._vad_carry = np.zeros(0, dtype=np.float32)
+        self.partial_task = None
+        self.bytes_received = 0
+        self.utterance_id = 0
+        self._reset_utterance()
+
+    def _reset_utterance(self):
+        self.utterance_start = self.ring.written
+        self.speech_samples = 0
+        self.trailing_silence = 0
+        self._last_partial_at = self.ring.written
+        self.utterance_id += 1
+
+    @property
+    def has_speech(self) -> bool:
+        return self.speech_samples >= self._min_speech
+
+    def _run_vad(self, samples: np.ndarray):
+        samples = np.concatenate((self._vad_carry, samples))
+        usable = len(samples) - len(samples) % self._frame
+        self._vad_carry = samples[usable:]
+
+        for frame in samples[:usable].reshape(-1, self._frame):
+            rms = float(np.sqrt(np.mean(frame * frame)))
+            if rms >= VAD_ENERGY_THRESHOLD:
+                self.speech_samples += self._frame
+                self.trailing_silence = 0
+            else:
+                self.trailing_silence += self._frame
+
+    def feed(self, data: bytes) -> bool:
+        """Append a chunk; returns True when the current utterance has ended."""
+        self.bytes_received += len(data)
+        samples = pcm_to_float32(data, self.encoding)
+        self.ring.write(samples)
+        self._run_vad(samples)
+
+        if not self.has_speech and self.trailing_silence >= self._end_silence:
+            # a click or cough, not speech: forget it
+            self.speech_samples = 0
+
+        if not self.speech_samples:
+            # nothing said yet: only keep a short pre-roll before speech
+            self.utterance_start = max(self.utterance_start, self.ring.written - self._preroll)
+            self._last_partial_at = self.utterance_start
+            return False
+
+        if self.ring.written - self.utterance_start >= self.ring.capacity:
+            return True
+
+        return self.has_speech and self.trailing_silence >= self._end_silence
+
+    def partial_due(self) -> bool:
+        return (
+            self.has_speech
+            and self.ring.written - self._last_partial_at >= self._partial_interval
+        )
+
+    def snapshot(self) -> np.ndarray:
+        """Current utterance as 16 kHz float32, for partial transcripts."""
+        self._last_partial_at = self.ring.written
+        return resample(self.ring.read(self.utterance_start), self.sample_rate)
+
+    def take_utterance(self) -> np.ndarray:
+        """Return the finished utterance (16 kHz float32) and start a new one."""
+        samples = resample(self.ring.read(self.utterance_start), self.sample_rate)
+        self._reset_utterance()
+        return samples
+
+
+# =========================
+# IN-MEMORY DECODING (one-shot uploads)
+# =========================
+def _decode_wav(data: bytes, max_samples: int) -> np.ndarray:
+    try:
+        with wave.open(io.BytesIO(data), "rb") as wav:
+            channels = wav.getnchannels()
+            width = wav.getsampwidth()
+            rate = wav.getframerate()
+            frames = wav.getnframes()
+
+            if frames * WHISPER_SAMPLE_RATE > max_samples * rate:
+                raise AudioTooLongError("Audio too long")
+
+            raw = wav.readframes(frames)
+    except (wave.Error, EOFError) as e:
+        raise AudioDecodeError(f"Invalid WAV: {e}")
+
+    if width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 2:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+    elif width == 4:
+        samples = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise AudioDecodeError(f"Unsupported WAV sample width: {width}")
+
+    if channels > 1:
+        samples = samples[: len(samples) - len(samples) % channels]
+        samples = samples.reshape(-1, channels).mean(axis=1)
+
+    return resample(samples, rate)
+
+
+def _decode_av(data: bytes, max_samples: int) -> np.ndarray:
+    # PyAV ships with faster-whisper; covers the compressed formats mobile
+    # recorders produce (m4a/aac, 3gp/amr, ogg/opus, mp3, webm)
+    try:
+        import av
+    except ImportError:
+        raise AudioDecodeError("No decoder available for this format")
+
+    resampler = av.audio.resampler.AudioResampler(
+        format="s16", layout="mono", rate=WHISPER_SAMPLE_RATE
+    )
+    chunks = []
+    total = 0
+
+    def _collect(frames):
+        nonlocal total
+        for out in frames:
+            arr = out.to_ndarray().reshape(-1)
+            total += len(arr)
+            if total > max_samples:
+                raise AudioTooLongError("Audio too long")
+            chunks.append(arr)
+
+    try:
+        with av.open(io.BytesIO(data), mode="r", metadata_errors="ignore") as container:
+            for frame in container.decode(audio=0):
+                frame.pts = None
+                _collect(resampler.resample(frame))
+            _collect(resampler.resample(None))
+    except AudioDecodeError:
+        raise
+    except Exception as e:
+        raise AudioDecodeError(f"Could not decode audio: {e}")
+
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(chunks).astype(np.float32) / 32768.0
+
+
+def decode_audio_bytes(data: bytes, max_seconds: float = MAX_DECODE_SECONDS) -> np.ndarray:
+    """
+    Decode an uploaded clip to 16 kHz mono float32 without touching disk.
+    Decoding stops (AudioDecodeError) once the clip exceeds max_seconds, so
+    a small compressed upload can't expand into an unbounded array.
+    """
+    if not data:
+        raise AudioDecodeError("Empty audio")
+
+    max_samples = int(max_seconds * WHISPER_SAMPLE_RATE)
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        try:
+            return _decode_wav(data, max_samples)
+        except AudioTooLongError:
+            raise
+        except AudioDecodeError:
+            # e.g. WAVE_FORMAT_EXTENSIBLE / float WAVs: let PyAV try
+            pass
+    return _decode_av(data, max_samples)
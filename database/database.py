@@ -1,9 +1,18 @@
 # app/database.py
 
-from sqlalchemy import create_engine
+import os
+import time
+import asyncio
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker
 from fastapi import HTTPException
 
+from scheduler import run_stage, StageBusyError
+
 # SQL Server (LOCAL MACHINE)
 SERVER = "LAPTOP-UMDMOS9I"
 USERNAME = "sa"
@@ -22,28 +31,220 @@ DATABASES = {
     # "db9": "ESM_SPINNING_ACCOUNTS",
 }
 
+# Connection pool, per database
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 10))    # seconds to wait for a connection
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))    # drop connections older than this
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "1") != "0"  # test connections on checkout
+
+# Lookups that fan out across every database (first_hit)
+DB_FANOUT_TIMEOUT = float(os.environ.get("DB_FANOUT_TIMEOUT", 5))  # seconds per DB
+DB_FANOUT_CONCURRENCY = int(os.environ.get("DB_FANOUT_CONCURRENCY", 4))  # DBs queried at once
+
 _engines = {}
 _sessions = {}
+_stats = {}
+_lock = threading.Lock()  # guards the dicts above and the _stats counters
+
 
 def _create_engine(dbname: str):
     # Use pymssql instead of pyodbc
     db_url = f"mssql+pymssql://{USERNAME}:{PASSWORD}@{SERVER}/{dbname}"
-    return create_engine(db_url, echo=False)
+    return create_engine(
+        db_url,
+        echo=False,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
 
-def get_db(db_key: str):
+
+def _session_factory(db_key: str):
     if db_key not in DATABASES:
         raise HTTPException(status_code=400, detail=f"Invalid DB key: {db_key}")
 
-    if db_key not in _engines:
-        _engines[db_key] = _create_engine(DATABASES[db_key])
-        _sessions[db_key] = sessionmaker(
-            autocommit=False,
-            autoflush=False,
-            bind=_engines[db_key]
-        )
+    factory = _sessions.get(db_key)
+    if factory is not None:
+        return factory
+
+    with _lock:
+        if db_key not in _sessions:
+            # stats first: pool_stats() reports every engine it finds
+            _stats[db_key] = {
+                "checkouts": 0,
+                "timeouts": 0,
+                "wait_total_s": 0.0,
+                "wait_max_s": 0.0,
+            }
+            _engines[db_key] = _create_engine(DATABASES[db_key])
+            _sessions[db_key] = sessionmaker(
+                autocommit=False,
+                autoflush=False,
+                bind=_engines[db_key]
+            )
+        return _sessions[db_key]
+
+
+@contextmanager
+def session_scope(db_key: str):
+    """
+    Session for one unit of work, always returned to the pool:
 
-    db = _sessions[db_key]()
+        with session_scope(db_key) as db:
+            db.execute(...)
+
+    The connection is checked out up front so pool waits are measured
+    and a saturated pool fails fast with 503 instead of hanging.
+    """
+    db = _session_factory(db_key)()
+    stats = _stats[db_key]
+    started = time.perf_counter()
     try:
+        try:
+            db.connection()
+        except PoolTimeoutError:
+            with _lock:
+                stats["timeouts"] += 1
+            raise HTTPException(status_code=503, detail=f"Database {db_key} is busy, try again")
+        waited = time.perf_counter() - started
+        with _lock:
+            stats["checkouts"] += 1
+            stats["wait_total_s"] += waited
+            stats["wait_max_s"] = max(stats["wait_max_s"], waited)
+
         yield db
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
+
+
+def get_db(db_key: str):
+    """FastAPI dependency form of session_scope()."""
+    with session_scope(db_key) as db:
+        yield db
+
+
+def warm_up(db_keys=None) -> dict:
+    """
+    Create the engines now and open one connection each, so the first
+    request doesn't pay for it and a bad DB shows up at startup.
+    Returns {db_key: error string or None}.
+    """
+    results = {}
+    for db_key in db_keys or DATABASES.keys():
+        try:
+            with session_scope(db_key) as db:
+                db.execute(text("SELECT 1"))
+            results[db_key] = None
+        except Exception as e:
+            results[db_key] = str(getattr(e, "detail", e))
+    return results
+
+
+def pool_stats() -> dict:
+    out = {}
+    for db_key, engine in list(_engines.items()):
+        pool = engine.pool
+        with _lock:
+            stats = dict(_stats[db_key])
+        checkouts = stats["checkouts"]
+        out[db_key] = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            # negative while the pool hasn't filled up to pool_size yet
+            "overflow": pool.overflow(),
+            "max_overflow": DB_MAX_OVERFLOW,
+            "checkouts": checkouts,
+            "timeouts": stats["timeouts"],
+            "wait_avg_ms": round(stats["wait_total_s"] * 1000 / checkouts, 2) if checkouts else 0.0,
+            "wait_max_ms": round(stats["wait_max_s"] * 1000, 2),
+        }
+    return out
+
+
+# =========================
+# ASYNC ACCESS
+# =========================
+# pymssql has no async driver: async callers hand blocking work to the
+# scheduler's bounded "db" stage, so DB latency never blocks the event loop
+# (WebSocket traffic) or uses up uvicorn's threadpool.
+async def run_db(fn, *args, **kwargs):
+    """Await blocking DB work, e.g. a function using session_scope()."""
+    try:
+        return await run_stage("db", fn, *args, **kwargs)
+    except StageBusyError:
+        raise HTTPException(status_code=503, detail="Database is busy, try again")
+
+
+def _fetch(db_key: str, sql: str, params: dict, one: bool):
+    with session_scope(db_key) as db:
+        result = db.execute(text(sql), params or {})
+        return result.fetchone() if one else result.fetchall()
+
+
+async def fetch_all(db_key: str, sql: str, params: dict = None) -> list:
+    return await run_db(_fetch, db_key, sql, params, False)
+
+
+async def fetch_one(db_key: str, sql: str, params: dict = None):
+    return await run_db(_fetch, db_key, sql, params, True)
+
+
+async def first_hit(query, db_keys=None, timeout: float = DB_FANOUT_TIMEOUT):
+    """
+    Run query(db, db_key) on every database and return (db_key, result)
+    for the first non-None result, or (None, None) when every database
+    answered "no row".
+
+    At most DB_FANOUT_CONCURRENCY databases are queried at once per lookup,
+    so a burst of lookups can't fill the db stage on its own. Latency is
+    the fastest hit rather than the sum over databases. A DB that errors,
+    is refused by a busy db stage or doesn't answer within `timeout` means
+    the answer is unknown: without a hit elsewhere that raises 503 rather
+    than reporting "not found". Queries not yet started when a hit arrives
+    are cancelled; running ones finish in the background and return their
+    connection to the pool.
+    """
+    keys = list(db_keys or DATABASES.keys())
+    slots = asyncio.Semaphore(max(1, DB_FANOUT_CONCURRENCY))
+
+    def _run(db_key):
+        with session_scope(db_key) as db:
+            return query(db, db_key)
+
+    async def _query(db_key):
+        async with slots:
+            return await asyncio.wait_for(run_db(_run, db_key), timeout)
+
+    tasks = {asyncio.ensure_future(_query(db_key)): db_key for db_key in keys}
+    pending = set(tasks)
+    failed = {}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                db_key = tasks[task]
+                try:
+                    result = task.result()
+                except asyncio.TimeoutError:
+                    failed[db_key] = f"no answer within {timeout}s"
+                    continue
+                except Exception as e:
+                    failed[db_key] = str(getattr(e, "detail", e))
+                    continue
+                if result is not None:
+                    return db_key, result
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    if failed:
+        print(f"DB fan-out failed on {len(failed)}/{len(keys)} databases: {failed}")
+        raise HTTPException(status_code=503, detail="Databases unavailable, try again")
+    return None, None
@@ -1,37 +1,97 @@
 # app/resources/Login/Login.py
 
+from typing import Optional
+
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
 from sqlalchemy import text
-from database.database import get_db, DATABASES
+from database.database import first_hit, fetch_all, DATABASES
+from database import employee_cache
 
 router = APIRouter()
 
+DETAIL_COLUMNS = "EmployeeMobile,CompCode,LocCode,EmpNo, FirstName, isActive, WeekOff, Designation, DeptName, BaseSalary"
+
 
 class EmployeeRequest(BaseModel):
     EmployeeMobile: str
 
 
+class CacheInvalidateRequest(BaseModel):
+    EmployeeMobile: Optional[str] = None
+    db_key: Optional[str] = None
+    EmpNo: Optional[str] = None
+
+
 @router.post("/employeeDetails")
-def Employee_Details(data: EmployeeRequest):
+async def Employee_Details(data: EmployeeRequest):
 
-    mobile = data.EmployeeMobile
+    mobile = data.EmployeeMobile.strip()
 
-    for db_key in DATABASES.keys():
+    sql = f"SELECT {DETAIL_COLUMNS} FROM Employee_Mst WHERE EmployeeMobile = :mobile"
 
-        db: Session = next(get_db(db_key))
+    def _lookup(db, db_key):
+        return db.execute(text(sql), {"mobile": mobile}).fetchone()
 
-        sql = "SELECT EmployeeMobile,CompCode,LocCode,EmpNo, FirstName, isActive, WeekOff, Designation, DeptName, BaseSalary FROM Employee_Mst WHERE EmployeeMobile = :mobile"
+    async def _load():
+        # all databases at once, first one that has the number wins; (None,
+        # None) only when every DB answered "no row", otherwise it raises
+        # 503, so a slow DB never gets a real employee negative-cached
+        db_key, result = await first_hit(_lookup)
+        return (db_key, dict(result._mapping)) if result else None
 
-        result = db.execute(text(sql), {"mobile": mobile}).fetchone()
+    hit = await employee_cache.read_through(employee_cache.mobile_key(mobile), _load)
 
-        if result:
-            return {
-                "status": True,
-                "message": "Employee details successfully",
-                "db_key": db_key,
-                "data": dict(result._mapping)
-            }
+    if hit:
+        db_key, employee = hit
+        return {
+            "status": True,
+            "message": "Employee details successfully",
+            "db_key": db_key,
+            "data": dict(employee)
+        }
 
     raise HTTPException(status_code=404, detail="Mobile number not found in any database")
+
+
+@router.get("/employeeDetails/{db_key}/{emp_no}")
+async def Employee_Details_By_EmpNo(db_key: str, emp_no: str):
+    """EmpNo is unique per (CompCode, LocCode), so this can return several rows."""
+    if db_key not in DATABASES:
+        raise HTTPException(status_code=400, detail=f"Invalid DB key: {db_key}")
+
+    sql = f"SELECT {DETAIL_COLUMNS} FROM Employee_Mst WHERE EmpNo = :emp_no ORDER BY CompCode, LocCode"
+
+    async def _load():
+        rows = await fetch_all(db_key, sql, {"emp_no": emp_no})
+        return [dict(row._mapping) for row in rows] or None
+
+    employees = await employee_cache.read_through(employee_cache.empno_key(db_key, emp_no), _load)
+
+    if employees:
+        return {
+            "status": True,
+            "message": "Employee details successfully",
+            "db_key": db_key,
+            "count": len(employees),
+            "data": [dict(emp) for emp in employees]
+        }
+
+    raise HTTPException(status_code=404, detail=f"EmpNo {emp_no} not found in {db_key}")
+
+
+@router.post("/employeeDetails/cache/invalidate")
+async def Invalidate_Employee_Cache(data: CacheInvalidateRequest):
+    """
+    Drop cached lookups after an employee is added or changed: by mobile,
+    by db_key + EmpNo, or everything when neither is given.
+    """
+    if data.EmpNo is not None and not data.db_key:
+        raise HTTPException(status_code=400, detail="EmpNo needs a db_key")
+
+    if not data.EmployeeMobile and data.EmpNo is None:
+        employee_cache.clear()
+        return {"status": True, "message": "Employee cache cleared"}
+
+    removed = employee_cache.invalidate(data.EmployeeMobile, data.db_key, data.EmpNo)
+    return {"status": True, "message": "Employee cache invalidated", "removed": removed}
@@ -0,0 +1,143 @@
+# database/employee_cache.py
+"""
+Read-through cache for employee lookups.
+
+Entries are keyed by mobile number and by (db_key, EmpNo). Found rows live
+for EMPLOYEE_CACHE_TTL seconds, numbers that matched nothing for the shorter
+EMPLOYEE_CACHE_NEGATIVE_TTL (so a just-registered employee isn't locked
+out for long), and the least recently used entries are evicted beyond
+EMPLOYEE_CACHE_SIZE. Concurrent misses for one key share a single query.
+"""
+import os
+import asyncio
+
+from ai_agent.query_cache import QueryCache
+
+EMPLOYEE_CACHE_SIZE = int(os.environ.get("EMPLOYEE_CACHE_SIZE", 10_000))
+EMPLOYEE_CACHE_TTL = float(os.environ.get("EMPLOYEE_CACHE_TTL", 300))
+EMPLOYEE_CACHE_NEGATIVE_TTL = float(os.environ.get("EMPLOYEE_CACHE_NEGATIVE_TTL", 30))
+
+# cached "looked it up, nothing there" (None means "not cached")
+_NOT_FOUND = object()
+
+_cache = QueryCache(EMPLOYEE_CACHE_SIZE, EMPLOYEE_CACHE_TTL)
+_inflight = {}  # key -> Future of the query already running for it
+# (db_key, EmpNo) key -> mobile keys cached with that employee, so
+# invalidating by EmpNo reaches them even when no EmpNo entry is cached
+_mobiles = {}
+
+
+def mobile_key(mobile: str) -> tuple:
+    return ("mobile", (mobile or "").strip())
+
+
+def empno_key(db_key: str, emp_no) -> tuple:
+    return ("empno", db_key, str(emp_no).strip())
+
+
+def _link_mobile(key: tuple, value):
+    db_key, row = value
+    if row.get("EmpNo") is None:
+        return
+    _mobiles.setdefault(empno_key(db_key, row["EmpNo"]), set()).add(key)
+    if len(_mobiles) > 2 * EMPLOYEE_CACHE_SIZE:
+        # forget links to entries the cache has already evicted
+        for emp_key, keys in list(_mobiles.items()):
+            live = {k for k in keys if k in _cache}
+            if live:
+                _mobiles[emp_key] = live
+            else:
+                del _mobiles[emp_key]
+
+
+async def read_through(key: tuple, loader):
+    """
+    Cached value for `key`, or `await loader()` on a miss.
+
+    The loader must return None only for a confirmed "no such employee":
+    that is cached too (negative caching). When the answer is unknown,
+    e.g. a database failed or timed out, it must raise instead, so the
+    next request tries again.
+    """
+    cached = _cache.get(key)
+    if cached is _NOT_FOUND:
+        return None
+    if cached is not None:
+        return cached
+
+    running = _inflight.get(key)
+    if running is not None:
+        return await asyncio.shield(running)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        value = await loader()
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # mark retrieved: only the waiters re-raise it
+        raise
+    except BaseException:
+        future.cancel()
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+    if value is None:
+        _cache.put(key, _NOT_FOUND, ttl_seconds=EMPLOYEE_CACHE_NEGATIVE_TTL)
+    else:
+        _cache.put(key, value)
+        if key[0] == "mobile":
+            _link_mobile(key, value)
+    future.set_result(value)
+    return value
+
+
+def invalidate(mobile: str = None, db_key: str = None, emp_no=None) -> int:
+    """
+    Drop the entries for a mobile number and/or (db_key, EmpNo), plus the
+    other key of any employee they held and the mobile entries linked to
+    that EmpNo. Returns the number removed.
+    """
+    pending = []
+    if mobile:
+        pending.append(mobile_key(mobile))
+    if db_key and emp_no is not None:
+        pending.append(empno_key(db_key, emp_no))
+
+    removed = 0
+    seen = set()
+    while pending:
+        key = pending.pop()
+        if key in seen:
+            continue
+        seen.add(key)
+        if key[0] == "empno":
+            pending.extend(_mobiles.pop(key, ()))
+        value = _cache.pop(key)
+        if value is None:
+            continue
+        removed += 1
+        if value is _NOT_FOUND:
+            continue
+        # mobile entries hold (db_key, row), EmpNo entries a list of rows
+        rows = [value] if key[0] == "mobile" else [(key[1], row) for row in value]
+        for row_db_key, row in rows:
+            if row.get("EmployeeMobile"):
+                pending.append(mobile_key(str(row["EmployeeMobile"])))
+            if row.get("EmpNo") is not None:
+                pending.append(empno_key(row_db_key, row["EmpNo"]))
+    return removed
+
+
+def clear():
+    _cache.clear()
+    _mobiles.clear()
+
+
+def stats() -> dict:
+    return {
+        **_cache.stats(),
+        "ttl_seconds": EMPLOYEE_CACHE_TTL,
+        "negative_ttl_seconds": EMPLOYEE_CACHE_NEGATIVE_TTL,
+    }
@@ -1,47 +1,260 @@
+import os
+import json
+import base64
+import binascii
+from typing import Optional
+
 from fastapi import APIRouter, HTTPException
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
 from sqlalchemy import text
-from database.database import get_db, DATABASES
+from database.database import session_scope, fetch_all, DATABASES
 
 router = APIRouter()
 
+# columns /api/employees can return (?fields=), and the default projection
+EMPLOYEE_COLUMNS = ("EmpNo", "FirstName", "EmployeeMobile", "Designation", "DeptName", "isActive", "CompCode", "LocCode")
+DEFAULT_FIELDS = ("EmpNo", "FirstName", "EmployeeMobile", "Designation", "DeptName", "isActive")
+
+# page order and cursor; EmpNo is only unique per (CompCode, LocCode).
+# Pages seek on an index over these columns, in this order, when one exists.
+CURSOR_COLUMNS = ("FirstName", "EmpNo", "CompCode", "LocCode")
+
+EMPLOYEES_PAGE_SIZE = int(os.environ.get("EMPLOYEES_PAGE_SIZE", 20))
+EMPLOYEES_PAGE_MAX = int(os.environ.get("EMPLOYEES_PAGE_MAX", 1000))
+
+
+def cursor_key(row: dict) -> list:
+    return [row[c] for c in CURSOR_COLUMNS]
+
+
+def _encode_cursor(db_key: str, row: dict) -> str:
+    raw = json.dumps({"db": db_key, "after": cursor_key(row)}, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str):
+    """(db_key, key values or None) where the next page starts."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        db_key, after = data["db"], data["after"]
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if db_key not in DATABASES or (after is not None and len(after) != len(CURSOR_COLUMNS)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return db_key, after
+
+
+def _parse_fields(fields: Optional[str]) -> list:
+    if not fields:
+        return list(DEFAULT_FIELDS)
+    wanted = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in wanted if f not in EMPLOYEE_COLUMNS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)} (allowed: {', '.join(EMPLOYEE_COLUMNS)})",
+        )
+    return list(dict.fromkeys(wanted))
+
+
+def employee_page_query(fields, filters: dict, after, limit: int):
+    """
+    SELECT for one page after the `after` key. It orders by the raw
+    CURSOR_COLUMNS and seeks past the cursor instead of skipping with
+    OFFSET, so with an index on (FirstName, EmpNo, CompCode, LocCode) every
+    page is a range seek of `limit` rows. NULL keys are handled by
+    keyset_after.
+    """
+    columns = list(dict.fromkeys(list(fields) + list(CURSOR_COLUMNS)))
+    where, params = [], {"n": limit}
+
+    for column, value in filters.items():
+        where.append(f"{column} = :{column}")
+        params[column] = value
+
+    if after is not None:
+        seek, seek_params = keyset_after(CURSOR_COLUMNS, after)
+        where.append(seek)
+        params.update(seek_params)
+
+    sql = f"""
+        SELECT TOP (:n) {", ".join(columns)}
+        FROM Employee_Mst
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY {", ".join(CURSOR_COLUMNS)}
+    """
+    return sql, params
+
+
+async def _fetch_page(db_key, fields, filters, after, limit) -> list:
+    sql, params = employee_page_query(fields, filters, after, limit)
+    return [dict(row._mapping) for row in await fetch_all(db_key, sql, params)]
+
+
+def _project(db_key: str, row: dict, fields) -> dict:
+    emp = {f: row[f] for f in fields}
+    emp["db_key"] = db_key   # important for future lookups
+    return emp
+
+
+async def _iter_pages(keys, fields, filters, start, page_size):
+    """
+    Yield (db_key, rows) pages from `start` to the end of the directory:
+    databases in DATABASES order, each walked in sort-key order.
+    """
+    start_db, after = start
+    for db_key in keys[keys.index(start_db):]:
+        while True:
+            rows = await _fetch_page(db_key, fields, filters, after, page_size)
+            if rows:
+                yield db_key, rows
+            if len(rows) < page_size:
+                break
+            after = cursor_key(rows[-1])
+        after = None
+
 
 @router.get("/employees")
-def get_all_employees():
+async def get_all_employees(
+    limit: int = EMPLOYEES_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    dept: Optional[str] = None,
+    designation: Optional[str] = None,
+    active: Optional[bool] = None,
+    fields: Optional[str] = None,
+    db_key: Optional[str] = None,
+    format: str = "json",
+):
     """
-    Get all employees (lightweight list)
+    Get employees (lightweight list), ordered by FirstName, EmpNo
     Used for AI resolution, dropdowns, analytics
+
+    - limit / cursor: page size, and the `next_cursor` of the previous page
+    - dept / designation / active: filters applied in SQL
+    - fields: comma-separated columns to return (db_key is always added)
+    - db_key: only this database
+    - format=ndjson: stream every matching row from `cursor` on, one JSON
+      object per line, `limit` rows per query
     """
+    if not 1 <= limit <= EMPLOYEES_PAGE_MAX:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {EMPLOYEES_PAGE_MAX}")
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be json or ndjson")
+    if db_key is not None and db_key not in DATABASES:
+        raise HTTPException(status_code=400, detail=f"Invalid DB key: {db_key}")
 
-    employees = []
+    keys = [db_key] if db_key else list(DATABASES.keys())
+    fields = _parse_fields(fields)
+    filters = {}
+    if dept:
+        filters["DeptName"] = dept
+    if designation:
+        filters["Designation"] = designation
+    if active is not None:
+        filters["isActive"] = 1 if active else 0
 
-    for db_key in DATABASES.keys():
-        db: Session = next(get_db(db_key))
+    start = _decode_cursor(cursor) if cursor else (keys[0], None)
+    if start[0] not in keys:
+        raise HTTPException(status_code=400, detail="Cursor is for another database")
 
-        sql = """
-            SELECT TOP 20
-                EmpNo,
-                FirstName,
-                EmployeeMobile,
-                Designation,
-                DeptName,
-                isActive
-            FROM Employee_Mst
-            ORDER BY FirstName
-        """
+    if format == "ndjson":
+        pages = _iter_pages(keys, fields, filters, start, limit)
+        # first page before the 200 goes out, so DB errors still get a status
+        first = await anext(pages, None)
 
-        results = db.execute(text(sql)).fetchall()
+        async def _lines():
+            page = first
+            while page is not None:
+                page_db, rows = page
+                yield "".join(
+                    json.dumps(_project(page_db, row, fields), default=str) + "\n" for row in rows
+                )
+                page = await anext(pages, None)
 
-        for row in results:
-            emp = dict(row._mapping)
-            emp["db_key"] = db_key   # important for future lookups
-            employees.append(emp)
+        return StreamingResponse(_lines(), media_type="application/x-ndjson")
 
-    if not employees:
+    employees, next_cursor = [], None
+    start_db, after = start
+    for page_db in keys[keys.index(start_db):]:
+        rows = await _fetch_page(page_db, fields, filters, after, limit - len(employees))
+        employees.extend(_project(page_db, row, fields) for row in rows)
+        if len(employees) == limit:
+            next_cursor = _encode_cursor(page_db, rows[-1])
+            break
+        after = None
+
+    if not employees and cursor is None:
         raise HTTPException(status_code=404, detail="No employees found")
 
     return {
         "status": True,
         "count": len(employees),
+        "next_cursor": next_cursor,
         "data": employees
     }
+
+
+def keyset_after(columns, values, prefix: str = "k"):
+    """
+    WHERE fragment and params for rows sorting after `values` in
+    ORDER BY `columns` (ascending; SQL Server sorts NULLs first).
+
+    A plain "a > :a OR (a = :a AND b > :b)" never matches NULL keys, so
+    rows with a NULL in any key column would silently drop out of every
+    later page; NULL cursor values get IS NULL / IS NOT NULL branches.
+    """
+    ors = []
+    for i, column in enumerate(columns):
+        terms = [
+            f"{columns[j]} IS NULL" if values[j] is None else f"{columns[j]} = :{prefix}{j}"
+            for j in range(i)
+        ]
+        terms.append(f"{column} IS NOT NULL" if values[i] is None else f"{column} > :{prefix}{i}")
+        ors.append("(" + " AND ".join(terms) + ")")
+    where = "(" + " OR ".join(ors) + ")"
+    if values[0] is not None:
+        # redundant, but gives SQL Server a range seek on the leading column
+        where = f"{columns[0]} >= :{prefix}0 AND {where}"
+    params = {f"{prefix}{i}": value for i, value in enumerate(values) if value is not None}
+    return where, params
+
+
+# columns the employee vector index embeds and keys on
+INDEX_COLUMNS = "CompCode, LocCode, EmpNo, EmployeeMobile, FirstName, Designation, DeptName"
+INDEX_KEY_COLUMNS = ("CompCode", "LocCode", "EmpNo")
+
+
+def iter_employees(db_key: str, batch_size: int = 1000):
+    """
+    Yield every employee of one database, `batch_size` rows per query.
+
+    Pages by the (CompCode, LocCode, EmpNo) key rather than OFFSET, so each
+    page is an index seek and only one page is in memory at a time. Rows
+    with NULLs in the key are included (see keyset_after), so the index
+    sync never mistakes them for deleted employees.
+    """
+    with session_scope(db_key) as db:
+        last = None
+        while True:
+            where, params = "", {"n": batch_size}
+            if last is not None:
+                seek, seek_params = keyset_after(INDEX_KEY_COLUMNS, [last[c] for c in INDEX_KEY_COLUMNS])
+                where = f"WHERE {seek}"
+                params.update(seek_params)
+
+            sql = f"""
+                SELECT TOP (:n) {INDEX_COLUMNS}
+                FROM Employee_Mst
+                {where}
+                ORDER BY CompCode, LocCode, EmpNo
+            """
+            rows = db.execute(text(sql), params).fetchall()
+
+            for row in rows:
+                emp = dict(row._mapping)
+                emp["db_key"] = db_key
+                yield emp
+
+            if len(rows) < batch_size:
+                break
+            last = rows[-1]._mapping
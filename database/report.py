@@ -1,61 +1,130 @@
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
-from sqlalchemy import text
+from fastapi.responses import StreamingResponse
 from datetime import datetime
-import pandas as pd
+import asyncio
+import csv
+import io
 import os
-import tempfile
 
-from database.database import get_db, DATABASES
+from database.database import fetch_all, DATABASES
+from database.getEmployees import employee_page_query, cursor_key
 
 router = APIRouter()
 
+# rows per DB query; only one page is in memory at a time
+REPORT_PAGE_SIZE = int(os.environ.get("REPORT_PAGE_SIZE", 2000))
 
-@router.get("/sales/report/excel")
-def download_sales_report():
-    data = []
+REPORT_FIELDS = ("EmpNo", "FirstName", "EmployeeMobile", "Designation", "DeptName", "isActive")
+REPORT_HEADERS = ("Emp No", "Employee Name", "Mobile", "Designation", "Department", "Status")
 
-    try:
-        for db_key in DATABASES.keys():
-            db = next(get_db(db_key))
-
-            rows = db.execute(text("""
-                SELECT TOP 10
-                    EmpNo,
-                    FirstName,
-                    EmployeeMobile,
-                    Designation,
-                    DeptName,
-                    isActive
-                FROM Employee_Mst
-                ORDER BY FirstName
-            """)).fetchall()
-
-            for r in rows:
-                data.append({
-                    "Emp No": r.EmpNo,
-                    "Employee Name": r.FirstName,
-                    "Mobile": r.EmployeeMobile,
-                    "Designation": r.Designation,
-                    "Department": r.DeptName,
-                    "Status": "Active" if r.isActive else "Inactive"
-                })
+REPORT_FORMATS = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _report_row(r: dict) -> tuple:
+    return (
+        r["EmpNo"],
+        r["FirstName"],
+        r["EmployeeMobile"],
+        r["Designation"],
+        r["DeptName"],
+        "Active" if r["isActive"] else "Inactive",
+    )
+
+
+async def report_pages(db_keys=None, page_size: int = REPORT_PAGE_SIZE):
+    """
+    Yield the report as lists of row tuples, one keyset-paged query per
+    page (databases in DATABASES order, employees by FirstName, EmpNo).
+    """
+    for db_key in db_keys or DATABASES.keys():
+        after = None
+        while True:
+            sql, params = employee_page_query(REPORT_FIELDS, {}, after, page_size)
+            rows = [dict(r._mapping) for r in await fetch_all(db_key, sql, params)]
+            if rows:
+                yield [_report_row(r) for r in rows]
+            if len(rows) < page_size:
+                break
+            after = cursor_key(rows[-1])
+
+
+def report_filename(fmt: str) -> str:
+    return f"employee_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+
+
+def _csv_chunk(rows) -> str:
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    return buf.getvalue()
+
+
+async def write_report(fmt: str, path: str, db_keys=None) -> int:
+    """
+    Write the whole report to `path` and return the number of rows.
 
+    xlsx goes through openpyxl's write-only mode, which spills rows to disk
+    as they are appended, so memory stays flat however large the report.
+    Queries run on the db stage; spreadsheet writing on the default
+    executor, off the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    count = 0
+
+    if fmt == "csv":
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:
+            f.write(_csv_chunk([REPORT_HEADERS]))
+            async for rows in report_pages(db_keys):
+                f.write(_csv_chunk(rows))
+                count += len(rows)
+        return count
+
+    from openpyxl import Workbook  # only needed when a report is requested
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Employees")
+    ws.append(REPORT_HEADERS)
+
+    def _append(rows):
+        for row in rows:
+            ws.append(row)
+
+    async for rows in report_pages(db_keys):
+        await loop.run_in_executor(None, _append, rows)
+        count += len(rows)
+    await loop.run_in_executor(None, wb.save, path)
+    return count
+
+
+async def _csv_response():
+    pages = report_pages()
+    # first page before the 200 goes out, so DB errors and "no data" get a status
+    try:
+        first = await anext(pages, None)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-
-    if not data:
+    if first is None:
         raise HTTPException(status_code=404, detail="No data found")
 
-    df = pd.DataFrame(data)
+    async def _body():
+        # BOM so Excel opens the file as UTF-8
+        yield "\ufeff" + _csv_chunk([REPORT_HEADERS]) + _csv_chunk(first)
+        async for rows in pages:
+            yield _csv_chunk(rows)
 
-    filename = f"employee_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    filepath = os.path.join(tempfile.gettempdir(), filename)
+    return StreamingResponse(
+        _body(),
+        media_type=REPORT_FORMATS["csv"],
+        headers={"Content-Disposition": f'attachment; filename="{report_filename("csv")}"'},
+    )
 
-    df.to_excel(filepath, index=False, engine="openpyxl")
 
-    return FileResponse(
-        path=filepath,
-        filename=filename,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
+# /sales/report/excel goes through the report job queue (report_jobs.py)
+@router.get("/sales/report/csv")
+async def download_sales_report_csv():
+    """Starts downloading with the first page; rows stream as they are read."""
+    return await _csv_response()
@@ -0,0 +1,282 @@
+# database/report_jobs.py
+"""
+Background report jobs.
+
+submit() queues a report and returns its job straight away; a fixed set of
+REPORT_JOB_WORKERS tasks write queued reports into REPORT_DIR. Asking for
+the same report again within REPORT_CACHE_TTL seconds returns the job that
+is already queued / running or the file it wrote. A periodic sweep
+deletes files once that window has passed, including ones left behind by
+a previous process or a cancelled job.
+"""
+import os
+import time
+import uuid
+import asyncio
+import logging
+import tempfile
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+
+from database.database import DATABASES
+from database.report import write_report, report_filename, REPORT_FORMATS
+
+logger = logging.getLogger("hybrid_server.reports")
+
+REPORT_JOB_WORKERS = int(os.environ.get("REPORT_JOB_WORKERS", 2))
+REPORT_JOB_QUEUE_DEPTH = int(os.environ.get("REPORT_JOB_QUEUE_DEPTH", 16))
+REPORT_CACHE_TTL = float(os.environ.get("REPORT_CACHE_TTL", 600))  # seconds
+REPORT_DIR = os.environ.get("REPORT_DIR", os.path.join(tempfile.gettempdir(), "employee_reports"))
+# how often expired jobs and stray files are cleaned up
+REPORT_SWEEP_INTERVAL = float(os.environ.get("REPORT_SWEEP_INTERVAL", 60))  # seconds
+
+router = APIRouter()
+
+
+class ReportJob:
+    def __init__(self, fmt: str, db_keys: tuple):
+        self.id = uuid.uuid4().hex
+        self.fmt = fmt
+        self.db_keys = db_keys
+        self.status = "queued"  # queued -> running -> done | failed
+        self.filename = report_filename(fmt)
+        self.path = os.path.join(REPORT_DIR, f"{self.id}.{fmt}")
+        self.rows = None
+        self.error = None
+        self.status_code = None  # HTTP status for a failed job
+        self.created = time.time()
+        self.finished = None
+        self.done = asyncio.Event()
+
+    @property
+    def download_url(self):
+        return f"/api/reports/jobs/{self.id}/download" if self.status == "done" else None
+
+    def to_dict(self) -> dict:
+        def _iso(ts):
+            return datetime.fromtimestamp(ts).isoformat(timespec="seconds") if ts else None
+
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "format": self.fmt,
+            "db_keys": list(self.db_keys),
+            "rows": self.rows,
+            "error": self.error,
+            "created_at": _iso(self.created),
+            "finished_at": _iso(self.finished),
+            "download_url": self.download_url,
+        }
+
+
+_jobs = {}     # job id -> ReportJob
+_by_key = {}   # (format, db_keys) -> latest job for those parameters
+_queue = None
+_workers = []
+_sweeper = None
+_stats = {"submitted": 0, "reused": 0, "completed": 0, "failed": 0}
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _expire():
+    """
+    Forget finished jobs older than REPORT_CACHE_TTL and delete their files,
+    plus any file in REPORT_DIR that no live job owns (left by an earlier
+    process or a cancelled job) once it is that old.
+    """
+    cutoff = time.time() - REPORT_CACHE_TTL
+    for job in [j for j in _jobs.values() if j.finished and j.finished < cutoff]:
+        _remove(job.path)
+        del _jobs[job.id]
+        key = (job.fmt, job.db_keys)
+        if _by_key.get(key) is job:
+            del _by_key[key]
+
+    owned = {os.path.basename(j.path) for j in _jobs.values()}
+    try:
+        names = os.listdir(REPORT_DIR)
+    except OSError:
+        return
+    for name in names:
+        path = os.path.join(REPORT_DIR, name)
+        try:
+            if name not in owned and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+async def _sweep():
+    while True:
+        try:
+            _expire()
+        except Exception as e:
+            logger.error("Report cleanup failed: %s", e)
+        await asyncio.sleep(REPORT_SWEEP_INTERVAL)
+
+
+def start():
+    """Start the periodic cleanup (its first pass runs right away)."""
+    global _sweeper
+    if _sweeper is None:
+        _sweeper = asyncio.ensure_future(_sweep())
+
+
+async def _worker():
+    while True:
+        job = await _queue.get()
+        job.status = "running"
+        started = time.perf_counter()
+        try:
+            os.makedirs(REPORT_DIR, exist_ok=True)
+            job.rows = await write_report(job.fmt, job.path, list(job.db_keys))
+            if not job.rows:
+                raise HTTPException(status_code=404, detail="No data found")
+            job.status = "done"
+            _stats["completed"] += 1
+            logger.info(
+                "Report %s (%s) ready: %d rows in %.1fs",
+                job.id, job.fmt, job.rows, time.perf_counter() - started,
+            )
+        except asyncio.CancelledError:
+            job.status = "failed"
+            job.error = "cancelled"
+            job.status_code = 503
+            _remove(job.path)
+            raise
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(getattr(e, "detail", e))
+            job.status_code = getattr(e, "status_code", 500)
+            _stats["failed"] += 1
+            _remove(job.path)
+            logger.error("Report %s (%s) failed: %s", job.id, job.fmt, job.error)
+        finally:
+            job.finished = time.time()
+            job.done.set()
+            _queue.task_done()
+
+
+def _ensure_workers():
+    global _queue
+    if _queue is None:
+        _queue = asyncio.Queue()
+    if not _workers:
+        _workers.extend(asyncio.ensure_future(_worker()) for _ in range(max(1, REPORT_JOB_WORKERS)))
+
+
+def submit(fmt: str = "xlsx", db_keys=None):
+    """
+    Queue a report, or reuse one with the same parameters from the last
+    REPORT_CACHE_TTL seconds. Returns (job, reused). Raises 503 when
+    REPORT_JOB_QUEUE_DEPTH reports are already waiting.
+    """
+    if fmt not in REPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(REPORT_FORMATS)}")
+    for db_key in db_keys or ():
+        if db_key not in DATABASES:
+            raise HTTPException(status_code=400, detail=f"Invalid DB key: {db_key}")
+
+    db_keys = tuple(db_keys or DATABASES.keys())
+    key = (fmt, db_keys)
+
+    job = _by_key.get(key)
+    fresh = job is not None and (not job.finished or job.finished >= time.time() - REPORT_CACHE_TTL)
+    if fresh and job.status != "failed" and (job.status != "done" or os.path.exists(job.path)):
+        _stats["reused"] += 1
+        return job, True
+
+    _ensure_workers()
+    if _queue.qsize() >= REPORT_JOB_QUEUE_DEPTH:
+        raise HTTPException(status_code=503, detail="Report queue is full, try again")
+
+    job = ReportJob(fmt, db_keys)
+    _jobs[job.id] = job
+    _by_key[key] = job
+    _stats["submitted"] += 1
+    _queue.put_nowait(job)
+    return job, False
+
+
+def get_job(job_id: str) -> ReportJob:
+    job = _jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found or expired")
+    return job
+
+
+def shutdown():
+    global _sweeper
+    for task in _workers:
+        task.cancel()
+    _workers.clear()
+    if _sweeper is not None:
+        _sweeper.cancel()
+        _sweeper = None
+
+
+def stats() -> dict:
+    return {
+        **_stats,
+        "workers": len(_workers),
+        "queued": _queue.qsize() if _queue is not None else 0,
+        "running": sum(1 for j in _jobs.values() if j.status == "running"),
+        "jobs": len(_jobs),
+        "cache_ttl_seconds": REPORT_CACHE_TTL,
+    }
+
+
+# =========================
+# API
+# =========================
+class ReportJobRequest(BaseModel):
+    format: str = "xlsx"
+    db_keys: Optional[List[str]] = None
+
+
+@router.post("/reports/jobs")
+async def submit_report_job(data: ReportJobRequest):
+    job, reused = submit(data.format, data.db_keys)
+    return {"status": True, "cached": reused, "job": job.to_dict()}
+
+
+@router.get("/reports/jobs/{job_id}")
+async def report_job_status(job_id: str):
+    return {"status": True, "job": get_job(job_id).to_dict()}
+
+
+@router.get("/reports/jobs/{job_id}/download")
+async def download_report_job(job_id: str):
+    job = get_job(job_id)
+    if job.status == "failed":
+        raise HTTPException(status_code=410, detail=f"Report failed: {job.error}")
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail="Report is not ready yet")
+    if not os.path.exists(job.path):
+        raise HTTPException(status_code=410, detail="Report file has expired")
+
+    # the file stays for REPORT_CACHE_TTL so repeat downloads are free
+    return FileResponse(path=job.path, filename=job.filename, media_type=REPORT_FORMATS[job.fmt])
+
+
+@router.get("/sales/report/excel")
+async def download_sales_report():
+    """
+    The Excel report, generated by a report worker. Identical requests
+    within REPORT_CACHE_TTL share one job and its file.
+    """
+    job, _ = submit("xlsx")
+    await asyncio.shield(job.done.wait())
+    if job.status != "done":
+        raise HTTPException(status_code=job.status_code or 500, detail=job.error)
+    return FileResponse(path=job.path, filename=job.filename, media_type=REPORT_FORMATS["xlsx"])
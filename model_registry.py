@@ -0,0 +1,85 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("hybrid_server.models")
+
+# name -> zero-arg loader, registered by the module that owns the model
+_loaders = {}
+_models = {}
+_load_seconds = {}
+_locks = {}
+_registry_lock = threading.Lock()
+
+
+def register(name: str, loader):
+    """Register how to load a model. Nothing is loaded until get()/warm_up()."""
+    with _registry_lock:
+        if name in _loaders and _loaders[name] is not loader:
+            raise ValueError(f"Model '{name}' is already registered")
+        _loaders[name] = loader
+        _locks.setdefault(name, threading.Lock())
+
+
+def get(name: str):
+    """Return the model, loading it on first use (once, even under concurrency)."""
+    try:
+        return _models[name]
+    except KeyError:
+        pass
+
+    try:
+        lock = _locks[name]
+    except KeyError:
+        raise KeyError(f"Unknown model: {name}")
+
+    with lock:
+        if name not in _models:
+            started = time.perf_counter()
+            _models[name] = _loaders[name]()
+            _load_seconds[name] = time.perf_counter() - started
+            logger.info("Loaded model '%s' in %.2fs", name, _load_seconds[name])
+    return _models[name]
+
+
+def is_loaded(name: str) -> bool:
+    return name in _models
+
+
+def warm_up(names=None, parallel: bool = True) -> dict:
+    """
+    Load the given (default: all registered) models now. With parallel=True
+    each model loads on its own thread, so total time is the slowest model,
+    not the sum. Returns {name: error string or None}.
+    """
+    names = list(names or _loaders.keys())
+    results = {}
+
+    def _load(name):
+        try:
+            get(name)
+            return None
+        except Exception as e:
+            logger.error("Warm-up of model '%s' failed: %s", name, e)
+            return str(e)
+
+    if not parallel or len(names) <= 1:
+        for name in names:
+            results[name] = _load(name)
+        return results
+
+    with ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="warmup") as pool:
+        for name, error in zip(names, pool.map(_load, names)):
+            results[name] = error
+    return results
+
+
+def status() -> dict:
+    return {
+        name: {
+            "loaded": name in _models,
+            "load_seconds": round(_load_seconds[name], 3) if name in _load_seconds else None,
+        }
+        for name in _loaders
+    }
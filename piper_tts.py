@@ -1,54 +1,279 @@
 import subprocess
-import uuid
 import os
+import io
+import re
+import json
+import wave
+import queue
 import base64
+import threading
+from contextlib import contextmanager
 
-PIPER_EXE = r"C:\Users\LENOVO\piper\piper.exe"            # adjust to your piper.exe path
-PIPER_MODEL = r"C:\Users\LENOVO\piper\models\en_US-amy-medium.onnx"  # adjust model path
+import model_registry
+from tts_cache import TTSCache, cache_key
 
-def synthesize(text: str) -> str:
+PIPER_EXE = os.environ.get("PIPER_EXE", r"C:\Users\LENOVO\piper\piper.exe")            # adjust to your piper.exe path
+PIPER_MODEL = os.environ.get("PIPER_MODEL", r"C:\Users\LENOVO\piper\models\en_US-amy-medium.onnx")  # adjust model path
+
+# number of warm voices kept loaded (should match TTS_WORKERS)
+PIPER_WORKERS = int(os.environ.get("PIPER_WORKERS", os.environ.get("TTS_WORKERS", 2)))
+PIPER_TIMEOUT = 45
+MAX_TTS_CHARS = 500
+DEFAULT_SAMPLE_RATE = 22050
+
+# audio cache: in-memory LRU + on-disk tier (set TTS_CACHE_DISK_MB=0 to disable disk)
+TTS_CACHE_MEMORY_MB = float(os.environ.get("TTS_CACHE_MEMORY_MB", 32))
+TTS_CACHE_DISK_MB = float(os.environ.get("TTS_CACHE_DISK_MB", 256))
+TTS_CACHE_DIR = os.environ.get(
+    "TTS_CACHE_DIR", os.path.join(os.environ.get("TMP_DIR", "./tmp"), "tts_cache")
+)
+
+# In-process ONNX voice (pip install piper-tts). When available the model is
+# loaded once per worker and reused for every reply; otherwise we fall back
+# to one piper.exe run per reply, streaming raw PCM over stdout.
+try:
+    from piper.voice import PiperVoice
+
+    _has_piper_voice = True
+except Exception:
+    PiperVoice = None
+    _has_piper_voice = False
+
+
+# =========================
+# TEXT / AUDIO HELPERS
+# =========================
+def _clean_text(text: str) -> str:
     if not text or not text.strip():
         return ""
 
-    MAX_TTS_CHARS = 500
     if len(text) > MAX_TTS_CHARS:
         text = text[:MAX_TTS_CHARS]
 
-    import re
-    text = re.sub(r"[^\x00-\x7F]+", "", text)
+    return re.sub(r"[^\x00-\x7F]+", "", text).strip()
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?;])\s+")
+MIN_SENTENCE_CHARS = 20
+
+
+def split_sentences(text: str) -> list:
+    """
+    Split a reply into sentence-sized pieces for streaming synthesis.
+    Very short fragments ("Ok.") are merged into the next sentence so the
+    client doesn't get a burst of tiny clips.
+    """
+    text = _clean_text(text)
+    if not text:
+        return []
+
+    sentences = []
+    carry = ""
+    for part in _SENTENCE_END.split(text):
+        part = part.strip()
+        if not part:
+            continue
+        carry = f"{carry} {part}".strip() if carry else part
+        if len(carry) >= MIN_SENTENCE_CHARS:
+            sentences.append(carry)
+            carry = ""
+
+    if carry:
+        if sentences:
+            sentences[-1] = f"{sentences[-1]} {carry}"
+        else:
+            sentences.append(carry)
+
+    return sentences
+
+
+def pcm_to_wav(pcm: bytes, sample_rate: int) -> bytes:
+    """Wrap 16-bit mono PCM in a WAV container, in memory."""
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return buf.getvalue()
+
+
+_model_sample_rate = None
+
+
+def _model_config_sample_rate() -> int:
+    global _model_sample_rate
+    if _model_sample_rate is None:
+        try:
+            with open(PIPER_MODEL + ".json", "r") as f:
+                _model_sample_rate = int(json.load(f)["audio"]["sample_rate"])
+        except Exception:
+            _model_sample_rate = DEFAULT_SAMPLE_RATE
+    return _model_sample_rate
+
+
+# =========================
+# WARM VOICE POOL
+# =========================
+class _VoicePool:
+    """Fixed set of loaded PiperVoice instances, one borrowed per synthesis."""
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self._idle = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _maybe_create(self):
+        with self._lock:
+            if self._created >= self.size:
+                return None
+            self._created += 1
+        try:
+            return PiperVoice.load(PIPER_MODEL)
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    @contextmanager
+    def voice(self):
+        try:
+            v = self._idle.get_nowait()
+        except queue.Empty:
+            v = self._maybe_create() or self._idle.get(timeout=PIPER_TIMEOUT)
+        try:
+            yield v
+        finally:
+            self._idle.put(v)
+
+    def warm_up(self):
+        while True:
+            v = self._maybe_create()
+            if v is None:
+                return
+            self._idle.put(v)
+
 
-    out_file = f"piper_out_{uuid.uuid4().hex}.wav"
+_pool = _VoicePool(PIPER_WORKERS)
 
+_cache = TTSCache(
+    memory_bytes=int(TTS_CACHE_MEMORY_MB * 1024 * 1024),
+    disk_dir=TTS_CACHE_DIR,
+    disk_bytes=int(TTS_CACHE_DISK_MB * 1024 * 1024),
+)
+
+
+def _voice_pcm(voice, text: str) -> bytes:
+    if hasattr(voice, "synthesize_stream_raw"):  # piper-tts 1.2
+        return b"".join(voice.synthesize_stream_raw(text))
+    return b"".join(chunk.audio_int16_bytes for chunk in voice.synthesize(text))
+
+
+def _synthesize_in_process(text: str):
+    with _pool.voice() as voice:
+        return _voice_pcm(voice, text), int(voice.config.sample_rate)
+
+
+def _synthesize_subprocess(text: str):
     cmd = [
         PIPER_EXE,
         "--model", PIPER_MODEL,
-        "--output_file", out_file
+        "--output_raw"
     ]
 
+    proc = subprocess.Popen(
+        cmd,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+
     try:
-        proc = subprocess.Popen(
-            cmd,
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
+        pcm, _ = proc.communicate(text.encode("utf-8"), timeout=PIPER_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.communicate()
+        raise
 
-        proc.stdin.write(text.encode("utf-8"))
-        proc.stdin.close()
+    if proc.returncode != 0:
+        return b"", _model_config_sample_rate()
 
-        proc.communicate(timeout=45)
+    return pcm, _model_config_sample_rate()
 
-        if proc.returncode != 0:
-            return ""
 
-        with open(out_file, "rb") as f:
-            audio_b64 = base64.b64encode(f.read()).decode("utf-8")
+# =========================
+# PUBLIC API
+# =========================
+def warm_up():
+    """Load all pooled voices up front so the first reply is not model-load bound."""
+    model_registry.get("piper")
 
-        return audio_b64
 
+def _load_voices():
+    if _has_piper_voice:
+        _pool.warm_up()
+    return _pool
+
+
+model_registry.register("piper", _load_voices)
+
+
+def synthesize_pcm(text: str):
+    """Return (16-bit mono PCM bytes, sample_rate); empty bytes on failure."""
+    text = _clean_text(text)
+    if not text:
+        return b"", DEFAULT_SAMPLE_RATE
+
+    try:
+        if _has_piper_voice:
+            return _synthesize_in_process(text)
+        return _synthesize_subprocess(text)
     except Exception as e:
         print("Piper error:", e)
+        return b"", DEFAULT_SAMPLE_RATE
+
+
+def _cache_key(text: str) -> str:
+    return cache_key(text, PIPER_MODEL, _model_config_sample_rate())
+
+
+def synthesize_wav(text: str) -> bytes:
+    key = _cache_key(_clean_text(text))
+    wav = _cache.get(key)
+    if wav is not None:
+        return wav
+
+    pcm, sample_rate = synthesize_pcm(text)
+    if not pcm:
+        return b""
+
+    wav = pcm_to_wav(pcm, sample_rate)
+    _cache.put(key, wav)
+    return wav
+
+
+def prewarm_texts(texts) -> list:
+    """
+    Expand fixed replies into everything a client may ask for: the whole
+    reply (one-shot audio) and each sentence (streamed audio). Only texts
+    not already cached are returned.
+    """
+    pending = []
+    for text in texts:
+        for piece in [text] + split_sentences(text):
+            if piece and piece not in pending and _cache_key(_clean_text(piece)) not in _cache:
+                pending.append(piece)
+    return pending
+
+
+def cache_stats() -> dict:
+    return _cache.stats()
+
+
+def synthesize(text: str) -> str:
+    """Base64 WAV for the JSON reply; "" when nothing could be synthesized."""
+    wav = synthesize_wav(text)
+    if not wav:
         return ""
-    finally:
-        if os.path.exists(out_file):
-            os.remove(out_file)
+    return base64.b64encode(wav).decode("utf-8")
@@ -0,0 +1,139 @@
+import asyncio
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("hybrid_server.scheduler")
+
+
+# =========================
+# STAGE CONFIG
+# =========================
+# Every blocking stage of the voice pipeline gets its own bounded pool so a
+# slow stage (e.g. Whisper on a long clip) can never starve the others, and
+# none of them ever runs on the asyncio loop that serves uvicorn/websockets.
+#
+#   <STAGE>_WORKERS      -> threads executing the stage concurrently
+#   <STAGE>_QUEUE_DEPTH  -> extra calls allowed to wait for a free worker
+#
+# Calls beyond workers + queue depth are rejected with StageBusyError.
+STAGE_DEFAULTS = {
+    "stt": {"workers": 2, "queue_depth": 4},
+    "embedding": {"workers": 2, "queue_depth": 16},
+    "llm": {"workers": 8, "queue_depth": 16},
+    "tts": {"workers": 2, "queue_depth": 8},
+    "db": {"workers": 8, "queue_depth": 32},
+}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(0, int(os.environ.get(name, default)))
+    except ValueError:
+        return default
+
+
+class StageBusyError(Exception):
+    """Raised when a stage already has workers + queue_depth calls in flight."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Stage '{stage}' is at capacity")
+        self.stage = stage
+
+
+class StagePool:
+    def __init__(self, name: str, workers: int, queue_depth: int):
+        self.name = name
+        self.workers = max(1, workers)
+        self.queue_depth = queue_depth
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix=f"stage-{name}"
+        )
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+        self._completed = 0
+
+    def _acquire(self) -> bool:
+        with self._lock:
+            if self._in_flight >= self.workers + self.queue_depth:
+                self._rejected += 1
+                return False
+            self._in_flight += 1
+            return True
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+
+    def submit(self, fn, *args, **kwargs):
+        """Submit to the pool; returns a concurrent.futures.Future."""
+        if not self._acquire():
+            raise StageBusyError(self.name)
+
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release()
+            raise
+
+        # released when the work really finishes, not when the awaiting
+        # coroutine goes away, so the bound holds even for cancelled clients
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn, *args, **kwargs):
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queue_depth,
+                "in_flight": self._in_flight,
+                "queued": max(0, self._in_flight - self.workers),
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def _build_pools() -> dict:
+    pools = {}
+    for stage, cfg in STAGE_DEFAULTS.items():
+        prefix = stage.upper()
+        pools[stage] = StagePool(
+            stage,
+            workers=_env_int(f"{prefix}_WORKERS", cfg["workers"]),
+            queue_depth=_env_int(f"{prefix}_QUEUE_DEPTH", cfg["queue_depth"]),
+        )
+    return pools
+
+
+_pools = _build_pools()
+
+
+def get_pool(stage: str) -> StagePool:
+    try:
+        return _pools[stage]
+    except KeyError:
+        raise ValueError(f"Unknown stage: {stage}")
+
+
+async def run_stage(stage: str, fn, *args, **kwargs):
+    """Run a blocking callable on the named stage pool without blocking the loop."""
+    return await get_pool(stage).run(functools.partial(fn, *args, **kwargs))
+
+
+def stage_stats() -> dict:
+    return {name: pool.stats() for name, pool in _pools.items()}
+
+
+def shutdown(wait: bool = False):
+    for pool in _pools.values():
+        pool.shutdown(wait=wait)
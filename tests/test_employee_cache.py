@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from database import employee_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    employee_cache.clear()
+    yield
+    employee_cache.clear()
+
+
+def _lookup(key, rows):
+    """read_through with a loader that returns the current rows[key]."""
+    async def _load():
+        return rows.get(key)
+
+    return asyncio.run(employee_cache.read_through(key, _load))
+
+
+def test_invalidate_by_empno_drops_cached_mobile():
+    key = employee_cache.mobile_key("9003344556")
+    rows = {key: ("db2", {"EmpNo": 7, "FirstName": "SIVA", "EmployeeMobile": "9003344556"})}
+    assert _lookup(key, rows)[1]["FirstName"] == "SIVA"
+
+    rows[key] = ("db2", {"EmpNo": 7, "FirstName": "SIVA KUMAR", "EmployeeMobile": "9003344556"})
+    assert _lookup(key, rows)[1]["FirstName"] == "SIVA"  # still cached
+
+    # only the mobile entry is cached; EmpNo is a string, as sent by the API
+    assert employee_cache.invalidate(db_key="db2", emp_no="7") == 1
+    assert _lookup(key, rows)[1]["FirstName"] == "SIVA KUMAR"
+
+
+def test_invalidate_by_empno_leaves_other_employees():
+    siva = employee_cache.mobile_key("9003344556")
+    mani = employee_cache.mobile_key("9840011223")
+    rows = {
+        siva: ("db2", {"EmpNo": 7, "FirstName": "SIVA", "EmployeeMobile": "9003344556"}),
+        mani: ("db1", {"EmpNo": 7, "FirstName": "MANI", "EmployeeMobile": "9840011223"}),
+    }
+    _lookup(siva, rows)
+    _lookup(mani, rows)
+
+    assert employee_cache.invalidate(db_key="db2", emp_no=7) == 1
+    rows[mani] = None
+    assert _lookup(mani, rows)[1]["FirstName"] == "MANI"
+
+
+def test_invalidate_by_mobile_also_drops_empno_entry():
+    mobile = employee_cache.mobile_key("9003344556")
+    empno = employee_cache.empno_key("db2", 7)
+    row = {"EmpNo": 7, "FirstName": "SIVA", "EmployeeMobile": "9003344556"}
+    _lookup(mobile, {mobile: ("db2", row)})
+    _lookup(empno, {empno: [row]})
+
+    assert employee_cache.invalidate(mobile="9003344556") == 2
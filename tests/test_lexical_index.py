@@ -0,0 +1,110 @@
+import hashlib
+import re
+
+import numpy as np
+import pytest
+
+from ai_agent.lexical_index import LexicalIndex, phonetic_key
+
+EMPLOYEES = {
+    1: {"EmpNo": 7, "FirstName": "SIVA", "EmployeeMobile": "9003344556"},
+    2: {"EmpNo": 12, "FirstName": "MANI", "EmployeeMobile": "9840011223"},
+    3: {"EmpNo": 1023, "FirstName": "S.MURUGAN", "EmployeeMobile": "8667571172"},
+    4: {"EmpNo": 88, "FirstName": "SHOWKATH ALI", "EmployeeMobile": "9443012345"},
+}
+
+# must never resolve to an employee
+OFF_TOPIC = (
+    "show me todays sales",
+    "show the stock",
+    "many thanks",
+    "what is the sales number for 7 days",
+    "who has 2 pending orders",
+    "download the sales report",
+    "hello how are you",
+)
+
+
+@pytest.fixture
+def lexical():
+    return LexicalIndex(EMPLOYEES, code_field="EmpNo", mobile_field="EmployeeMobile", name_field="FirstName")
+
+
+def test_stopword_collides_phonetically_with_a_name():
+    # the reason stopwords get no phonetic keys
+    assert phonetic_key("show") == phonetic_key("siva")
+
+
+@pytest.mark.parametrize("query", OFF_TOPIC)
+def test_off_topic_has_no_exact_or_named_hit(lexical, query):
+    assert lexical.exact(query) == []
+    assert lexical.named(query) == set()
+
+
+def test_off_topic_stopwords_get_no_fuzzy_matches(lexical):
+    assert lexical.ranked("show me todays sales") == []
+    assert lexical.ranked("show the stock") == []
+
+
+def test_code_needs_an_employee_cue(lexical):
+    assert lexical.exact("emp no 7") == [1]
+    assert lexical.exact("employee 7 details") == [1]
+    assert lexical.exact("empno: 1023") == [3]
+    assert lexical.exact("7") == [1]
+    assert lexical.exact("sales number for 7 days") == []
+
+
+def test_mobile_and_name_lookups(lexical):
+    assert lexical.exact("call 98400 11223") == [2]
+    assert lexical.exact("mani") == [2]
+    assert lexical.named("details of mani please") == {2}
+    # STT spelling variants still rank the right person
+    assert lexical.ranked("shiva")[0] == 1
+
+
+class _BagOfWordsEncoder:
+    """Deterministic stand-in for the sentence encoder."""
+    DIM = 64
+
+    def get_sentence_embedding_dimension(self):
+        return self.DIM
+
+    def encode(self, texts, **kwargs):
+        out = np.zeros((len(texts), self.DIM), dtype="float32")
+        for i, text in enumerate(texts):
+            for token in re.findall(r"[a-z0-9]+", text.lower()):
+                out[i, int(hashlib.md5(token.encode()).hexdigest(), 16) % self.DIM] += 1.0
+        return out
+
+
+@pytest.fixture
+def employees(tmp_path, monkeypatch):
+    from ai_agent import vector_store
+    from ai_agent.employee_store import EmployeeVectorStore
+
+    encoder = _BagOfWordsEncoder()
+    monkeypatch.setattr(vector_store, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(vector_store, "get_encoder", lambda: encoder)
+    monkeypatch.setattr(vector_store, "embedding_dim", lambda: encoder.DIM)
+    vector_store._query_vectors.clear()
+
+    store = EmployeeVectorStore()
+    store.sync([
+        {**row, "db_key": "db1", "CompCode": 1, "LocCode": 1,
+         "Designation": "Operator", "DeptName": "Weaving"}
+        for row in EMPLOYEES.values()
+    ])
+    return store
+
+
+@pytest.mark.parametrize("query", OFF_TOPIC)
+def test_off_topic_below_min_score_returns_nothing(employees, query):
+    # no vector hit passes the cut-off, so phonetic / prefix matches
+    # alone must not reach the LLM context
+    assert employees.search(query, min_score=1.01) == []
+
+
+def test_named_query_below_min_score_still_matches(employees):
+    hits = employees.search("details of mani please", min_score=1.01)
+    assert [h["FirstName"] for h in hits] == ["MANI"]
+    assert hits[0]["_match"] == "lexical"
@@ -0,0 +1,195 @@
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def voice_id(voice_model: str) -> str:
+    """
+    Identity of a voice file: absolute path plus size and mtime, so voices
+    with the same file name in different directories, or a model replaced
+    in place, never share cache entries.
+    """
+    path = os.path.abspath(voice_model)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return path
+    return f"{path}\0{st.st_size}\0{st.st_mtime_ns}"
+
+
+def cache_key(text: str, voice_model: str, sample_rate: int) -> str:
+    raw = f"{voice_id(voice_model)}\0{sample_rate}\0{normalize_text(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """
+    Content-addressed audio cache.
+
+    Tier 1: in-memory LRU capped by total bytes.
+    Tier 2: one file per key under `disk_dir`, capped by total bytes,
+            evicted least-recently-used first (mtime is bumped on hit).
+    A disk hit is promoted to memory. Values are WAV bytes.
+    File reads, writes and deletes happen outside the lock; only the
+    bookkeeping is locked.
+    """
+
+    def __init__(self, memory_bytes: int, disk_dir: str = None, disk_bytes: int = 0):
+        self.memory_bytes = memory_bytes
+        self.disk_dir = disk_dir if disk_bytes > 0 else None
+        self.disk_bytes = disk_bytes
+
+        self._mem = OrderedDict()
+        self._mem_size = 0
+        self._disk = OrderedDict()  # key -> size, oldest first
+        self._disk_size = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.disk_dir:
+            self._scan_disk()
+
+    # -------------------------
+    # disk tier
+    # -------------------------
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.wav")
+
+    def _scan_disk(self):
+        os.makedirs(self.disk_dir, exist_ok=True)
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".wav"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.disk_dir, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, name[:-4], st.st_size))
+
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_size += size
+        self._delete(self._evict_disk())
+
+    def _evict_disk(self) -> list:
+        """Drop the oldest entries past disk_bytes; returns their files to delete."""
+        victims = []
+        while self._disk and self._disk_size > self.disk_bytes:
+            key, size = self._disk.popitem(last=False)
+            self._disk_size -= size
+            victims.append(self._path(key))
+        return victims
+
+    @staticmethod
+    def _delete(paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _read_file(self, key: str):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def _write_file(self, key: str, data: bytes) -> bool:
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            self._delete([tmp])
+            return False
+        return True
+
+    # -------------------------
+    # memory tier
+    # -------------------------
+    def _put_mem(self, key: str, data: bytes):
+        if len(data) > self.memory_bytes:
+            return
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._mem_size -= len(old)
+        self._mem[key] = data
+        self._mem_size += len(data)
+        while self._mem_size > self.memory_bytes:
+            _, evicted = self._mem.popitem(last=False)
+            self._mem_size -= len(evicted)
+
+    # -------------------------
+    # public API
+    # -------------------------
+    def get(self, key: str):
+        with self._lock:
+            data = self._mem.get(key)
+            if data is not None:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return data
+            if not self.disk_dir or key not in self._disk:
+                self.misses += 1
+                return None
+
+        data = self._read_file(key)
+
+        with self._lock:
+            if data is None:
+                # evicted or removed meanwhile
+                self._disk_size -= self._disk.pop(key, 0)
+                self.misses += 1
+                return None
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            self._put_mem(key, data)
+            self.disk_hits += 1
+            return data
+
+    def put(self, key: str, data: bytes):
+        if not data:
+            return
+        with self._lock:
+            self._put_mem(key, data)
+        if not self.disk_dir or len(data) > self.disk_bytes:
+            return
+        if not self._write_file(key, data):
+            return
+        with self._lock:
+            self._disk_size += len(data) - self._disk.pop(key, 0)
+            self._disk[key] = len(data)
+            victims = self._evict_disk()
+        self._delete(victims)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._mem or key in self._disk
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "memory_entries": len(self._mem),
+                "memory_bytes": self._mem_size,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_size,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
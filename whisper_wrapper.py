@@ -1,12 +1,89 @@
-from faster_whisper import WhisperModel
+import os
+import time
+import threading
 
-# Load model once
-model = WhisperModel(
-    "small",
-    device="cpu",
-    compute_type="int8"
+import model_registry
+
+WHISPER_MODEL_SIZE = os.environ.get("WHISPER_MODEL_SIZE", "small")
+WHISPER_DEVICE = os.environ.get("WHISPER_DEVICE", "cpu")
+WHISPER_COMPUTE_TYPE = os.environ.get("WHISPER_COMPUTE_TYPE", "int8")
+
+# Model replicas: ctranslate2 keeps `num_workers` copies of the model so that
+# that many transcriptions run truly in parallel, each pinned to
+# `cpu_threads` intra-op threads. Default splits the cores evenly.
+WHISPER_REPLICAS = max(1, int(os.environ.get("WHISPER_REPLICAS", 1)))
+WHISPER_CPU_THREADS = int(
+    os.environ.get("WHISPER_CPU_THREADS", max(1, (os.cpu_count() or 1) // WHISPER_REPLICAS))
 )
 
+
+# Load model once, on first transcription (or model_registry.warm_up)
+def _load_model():
+    from faster_whisper import WhisperModel
+
+    return WhisperModel(
+        WHISPER_MODEL_SIZE,
+        device=WHISPER_DEVICE,
+        compute_type=WHISPER_COMPUTE_TYPE,
+        cpu_threads=WHISPER_CPU_THREADS,
+        num_workers=WHISPER_REPLICAS,
+    )
+
+
+model_registry.register("whisper", _load_model)
+
+
+def _transcribe(audio, vad_filter: bool = True) -> str:
+    segments, info = model_registry.get("whisper").transcribe(
+        audio,
+        task="translate",
+        beam_size=1,
+        vad_filter=vad_filter,
+        temperature=0.0
+    )
+
+    text = " ".join(seg.text for seg in segments).strip()
+
+    print("Detected language:", info.language, "prob:", info.language_probability)
+    print("Translated Text (EN):", text)
+
+    return text
+
+
+# =========================
+# STATS
+# =========================
+# STT stage threads call the model directly: with num_workers replicas,
+# ctranslate2 runs that many transcriptions in parallel.
+_stats_lock = threading.Lock()
+_stats = {"transcriptions": 0, "in_flight": 0, "seconds_total": 0.0}
+
+
+def _transcribe_counted(audio, vad_filter: bool = True) -> str:
+    with _stats_lock:
+        _stats["in_flight"] += 1
+    started = time.perf_counter()
+    try:
+        return _transcribe(audio, vad_filter=vad_filter)
+    finally:
+        with _stats_lock:
+            _stats["in_flight"] -= 1
+            _stats["transcriptions"] += 1
+            _stats["seconds_total"] += time.perf_counter() - started
+
+
+def stt_stats() -> dict:
+    with _stats_lock:
+        done = _stats["transcriptions"]
+        return {
+            "replicas": WHISPER_REPLICAS,
+            "cpu_threads": WHISPER_CPU_THREADS,
+            "in_flight": _stats["in_flight"],
+            "transcriptions": done,
+            "avg_ms": round(_stats["seconds_total"] * 1000 / done, 1) if done else 0.0,
+        }
+
+
 def transcribe_audio(audio_file: str) -> str:
     """
     Transcribe & TRANSLATE any language → English
@@ -14,21 +91,20 @@ def transcribe_audio(audio_file: str) -> str:
     print("Running Faster-Whisper on:", audio_file)
 
     try:
-        segments, info = model.transcribe(
-            audio_file,
-            task="translate",  
-            beam_size=1,
-            vad_filter=True,
-            temperature=0.0
-        )
-
-        text = " ".join(seg.text for seg in segments).strip()
-
-        print("Detected language:", info.language, "prob:", info.language_probability)
-        print("Translated Text (EN):", text)
+        return _transcribe_counted(audio_file)
+    except Exception as e:
+        print("Whisper Error:", e)
+        return ""
 
-        return text
 
+def transcribe_pcm(samples, partial: bool = False) -> str:
+    """
+    Same as transcribe_audio for an in-memory 16 kHz mono float32 array
+    (streamed uploads). Partial passes skip Whisper's VAD since the stream
+    session has already trimmed silence.
+    """
+    try:
+        return _transcribe_counted(samples, vad_filter=not partial)
     except Exception as e:
         print("Whisper Error:", e)
         return ""